@@ -0,0 +1,115 @@
+"""
+Benchmarks of the simulation hot paths, in the layout of asv: each class is set up once per combination of its
+``params``, and every ``time_`` method is timed. Run them with ``python -m benchmarks.run``, which also records the
+peak RSS of each benchmark.
+"""
+
+import dataclasses
+import shutil
+import tempfile
+from pathlib import Path
+
+from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.distributions import Degenerate
+from smr_mcs.functions import mc_run
+from smr_mcs.parse_cache import ParseCache
+from smr_mcs.project import load_simulation_projects_from_csv, load_simulation_projects_from_yaml
+from smr_mcs.simulation_runner import run_simulation, run_simulation_concurrent, store_results
+
+ROOT = Path(__file__).resolve().parent.parent
+CONFIG = ROOT / "config/reference.yaml"
+DATASET = ROOT / "data/reference.yaml"
+
+
+def _config(**changes) -> SimulationConfig:
+    return dataclasses.replace(SimulationConfig.from_yaml(CONFIG), **changes)
+
+
+class MonteCarloRun:
+    """``mc_run`` of a single project, by scaling option, number of samples, operating years and kernel."""
+
+    params = (
+        [option.value for option in ScalingOption],
+        [10_000, 100_000, 1_000_000],
+        [30, 60, 90],
+        ["matrix", "reduced"],
+    )
+    param_names = ("scaling", "n", "operating_years", "kernel")
+    timeout = 600
+
+    def setup(self, scaling: str, n: int, operating_years: int, kernel: str):
+        pj = load_simulation_projects_from_yaml(DATASET)[0]
+        # A fixed operating time sets the length of the timeline
+        self.pj = dataclasses.replace(pj, time=dataclasses.replace(pj.time, operating=Degenerate(operating_years)))
+        self.config = _config(n=n, opt_scaling=ScalingOption(scaling), kernel=kernel)
+
+    def time_mc_run(self, scaling: str, n: int, operating_years: int, kernel: str):
+        mc_run(self.config, self.pj)
+
+
+class Runners:
+    """All projects of the reference dataset, sequentially and with the concurrent backends."""
+
+    params = (["sequential", "processes", "threads"], [10_000, 100_000])
+    param_names = ("runner", "n")
+    timeout = 900
+
+    def setup(self, runner: str, n: int):
+        self.pjs = load_simulation_projects_from_yaml(DATASET)
+        self.config = _config(n=n, kernel="reduced")
+
+    def time_run(self, runner: str, n: int):
+        if runner == "sequential":
+            run_simulation(self.pjs, self.config)
+        else:
+            run_simulation_concurrent(self.pjs, self.config, 2, backend=runner)
+
+
+class StoreResults:
+    """``store_results`` of the reference dataset, by result format."""
+
+    params = (["npy", "parquet", "csv"], [100_000])
+    param_names = ("result_format", "n")
+    timeout = 600
+
+    def setup(self, result_format: str, n: int):
+        if result_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                # Skips the benchmark, as in asv
+                raise NotImplementedError("pyarrow is not installed")
+        self.pjs = load_simulation_projects_from_yaml(DATASET)
+        self.config = _config(n=n, kernel="reduced")
+        self.results = run_simulation(self.pjs, self.config)
+        self.output_path = Path(tempfile.mkdtemp())
+
+    def teardown(self, result_format: str, n: int):
+        shutil.rmtree(self.output_path, ignore_errors=True)
+
+    def time_store_results(self, result_format: str, n: int):
+        store_results(*self.results, self.config, self.output_path, self.pjs, result_format=result_format)
+
+
+class LoadProjects:
+    """Loading a dataset from YAML, and from YAML parsed before."""
+
+    params = (["reference", "adjusted"],)
+    param_names = ("dataset",)
+
+    def setup(self, dataset: str):
+        self.cache = ParseCache()
+        load_simulation_projects_from_yaml(ROOT / f"data/{dataset}.yaml", cache=self.cache)
+
+    def time_load_simulation_projects_from_yaml(self, dataset: str):
+        load_simulation_projects_from_yaml(ROOT / f"data/{dataset}.yaml")
+
+    def time_load_simulation_projects_from_yaml_cached(self, dataset: str):
+        load_simulation_projects_from_yaml(ROOT / f"data/{dataset}.yaml", cache=self.cache)
+
+
+class LoadProjectsCsv:
+    """Loading the raw project data from CSV."""
+
+    def time_load_simulation_projects_from_csv(self):
+        load_simulation_projects_from_csv(ROOT / "data/project_data_raw.csv")
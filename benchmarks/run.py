@@ -0,0 +1,170 @@
+"""
+Runs the benchmarks of ``benchmarks/benchmarks.py`` and saves the results as JSON, one file per commit, so that
+regressions show up between commits:
+
+    python -m benchmarks.run --filter MonteCarloRun --quick
+    python -m benchmarks.run --compare results/benchmarks/<old>.json results/benchmarks/<new>.json
+
+Every benchmark runs in a fresh interpreter, so its peak RSS is not inflated by the benchmarks before it.
+"""
+
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks import benchmarks
+
+parser = argparse.ArgumentParser(
+    prog="Benchmarks",
+    description="Times the benchmarks, records their peak RSS and saves the results as JSON.",
+)
+parser.add_argument("-f", "--filter", default="", help="Regular expression the benchmark names must match.")
+parser.add_argument("-r", "--repeats", type=int, default=3, help="Timed runs per benchmark, the best is kept.")
+parser.add_argument("--quick", action="store_true", help="Run only the first value of each parameter.")
+parser.add_argument("-o", "--output", default="results/benchmarks", help="Directory of the JSON results.")
+parser.add_argument(
+    "--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two JSON results instead of running the benchmarks."
+)
+parser.add_argument("--threshold", type=float, default=1.1, help="Ratio of new to old that counts as a regression.")
+parser.add_argument("--case", nargs=3, metavar=("CLASS", "METHOD", "PARAMS"), help=argparse.SUPPRESS)
+
+
+def benchmark_cases(quick: bool = False):
+    """
+    Yields the class, method name and parameter combination of every benchmark, sorted by class name.
+
+    :param quick: Only use the first value of each parameter.
+    """
+    for class_name, cls in inspect.getmembers(benchmarks, inspect.isclass):
+        if cls.__module__ != benchmarks.__name__:
+            continue
+        params = [values[:1] if quick else values for values in getattr(cls, "params", ())]
+        methods = [name for name in vars(cls) if name.startswith("time_")]
+        for method, combination in itertools.product(methods, itertools.product(*params)):
+            yield class_name, method, combination
+
+
+def case_name(class_name: str, method: str, params: tuple) -> str:
+    return f"{class_name}.{method}({', '.join(map(str, params))})"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and of its waited-for children, whichever is larger, in MB."""
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    peaks = [resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return max(peaks) * unit / 2**20
+
+
+def run_case(class_name: str, method: str, params: tuple, repeats: int) -> dict:
+    """
+    Sets up a benchmark and times it. Returns the best and all wall times in seconds, and the peak RSS after the
+    setup and after the runs in MB. A setup raising ``NotImplementedError`` skips the benchmark, as in asv.
+    """
+    benchmark = getattr(benchmarks, class_name)()
+    try:
+        if hasattr(benchmark, "setup"):
+            benchmark.setup(*params)
+    except NotImplementedError as e:
+        return {"skipped": str(e)}
+    setup_rss = peak_rss_mb()
+
+    times = []
+    try:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            getattr(benchmark, method)(*params)
+            times.append(time.perf_counter() - start_time)
+    finally:
+        if hasattr(benchmark, "teardown"):
+            benchmark.teardown(*params)
+    return {"seconds": min(times), "all_seconds": times, "setup_rss_mb": setup_rss, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_all(pattern: str, repeats: int, quick: bool) -> dict:
+    results = {}
+    for class_name, method, params in benchmark_cases(quick):
+        name = case_name(class_name, method, params)
+        if not re.search(pattern, name):
+            continue
+        timeout = getattr(getattr(benchmarks, class_name), "timeout", 60) * repeats
+        command = [sys.executable, "-m", "benchmarks.run", "--case", class_name, method, json.dumps(params)]
+        command += ["--repeats", str(repeats)]
+        try:
+            process = subprocess.run(command, capture_output=True, text=True, timeout=timeout, check=True)
+        except subprocess.TimeoutExpired:
+            result = {"failed": f"timed out after {timeout} s"}
+        except subprocess.CalledProcessError as error:
+            # A case killed by a signal, e.g. out of memory, leaves no traceback
+            lines = error.stderr.strip().splitlines()
+            result = {"failed": lines[-1] if lines else f"exited with status {error.returncode}"}
+        else:
+            result = json.loads(process.stdout.splitlines()[-1])
+        results[name] = {"class": class_name, "method": method, "params": list(params), **result}
+        if "seconds" in result:
+            print(f"{name}: {result['seconds']:.3f} s, {result['peak_rss_mb']:.0f} MB")
+        else:
+            print(f"{name}: {result.get('skipped') or result.get('failed')}")
+    return results
+
+
+def git_commit() -> str:
+    process = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=False)
+    return process.stdout.strip() if process.returncode == 0 else "unknown"
+
+
+def compare(old_file: Path, new_file: Path, threshold: float) -> int:
+    """
+    Prints the ratio of new to old wall time and peak RSS of the benchmarks in both files, and returns the number
+    of regressions, i.e. ratios above ``threshold``.
+    """
+    old, new = (json.loads(Path(file).read_text()) for file in (old_file, new_file))
+    print(f"{old['commit']} -> {new['commit']}")
+    regressions = 0
+    for name, result in new["benchmarks"].items():
+        reference = old["benchmarks"].get(name, {})
+        if "seconds" not in result or "seconds" not in reference:
+            continue
+        time_ratio = result["seconds"] / reference["seconds"]
+        rss_ratio = result["peak_rss_mb"] / reference["peak_rss_mb"]
+        regressed = time_ratio > threshold or rss_ratio > threshold
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name}: time x{time_ratio:.2f}, peak RSS x{rss_ratio:.2f}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    if args.case:
+        class_name, method, params = args.case
+        print(json.dumps(run_case(class_name, method, tuple(json.loads(params)), args.repeats)))
+        sys.exit()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "repeats": args.repeats,
+        "benchmarks": run_all(args.filter, args.repeats, args.quick),
+    }
+    output_path = Path.cwd() / args.output
+    output_path.mkdir(parents=True, exist_ok=True)
+    output_file = output_path / f"{commit}.json"
+    output_file.write_text(json.dumps(results, indent=2))
+    print(f"Saved results to {output_file}")
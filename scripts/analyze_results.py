@@ -1,5 +1,4 @@
 # %%
-import json
 from pathlib import Path
 
 import pandas as pd
@@ -7,45 +6,36 @@ import plotly.graph_objects as go
 import pyperclip
 
 from scripts.case_studies import get_project_data
+from smr_mcs.catalog import CATALOG_FILE, RunCatalog
 from smr_mcs.config import ScalingOption
+from smr_mcs.result_store import load_results
 
+catalog = RunCatalog(Path.cwd() / "results" / CATALOG_FILE)
+# Runs stored without store_results, e.g. before the catalog existed or copied from another machine
+catalog.index_directory()
 
-def get_result_path(dataset: str, scaling_type: ScalingOption, conf_hash: str) -> Path:
-    results_path = Path.cwd() / f"results/{dataset}/{scaling_type.value}"
-    results = [i for i in results_path.glob("*")]
 
-    for r in results:
-        if conf_hash == r.name[: len(conf_hash)]:
-            return r
+def get_result_path(dataset: str, scaling_type: ScalingOption, conf_hash: str) -> Path:
+    runs = catalog.find_runs(dataset=dataset, scaling=scaling_type.value, config_hash=conf_hash)
+    if runs:
+        return runs[0].path
 
 
 def get_result_paths(dataset: str, scaling_type: ScalingOption) -> list[Path]:
-    results_path = Path.cwd() / f"results/{dataset}/{scaling_type.value}"
-    return [i for i in results_path.glob("*") if i.is_dir()]
+    return [run.path for run in catalog.find_runs(dataset=dataset, scaling=scaling_type.value)]
 
 
-def find_unit_doublings(dataset: str, scaling_type: ScalingOption) -> dict[int, str]:
+def find_unit_doublings(
+    dataset: str, scaling_type: ScalingOption, variant: str | None = "components"
+) -> dict[int, str]:
     """
-    Searches through subfolders to find config.json files and extracts
-    the value of "unit_doubling".
+    Looks up the stored unit doublings of a dataset in the run catalog.
 
     :param str: The uid of the dataset.
+    :param variant: Variant of the runs, the sweeps of job_scheduler store runs recombined from components.
     :return: A dictionary with unit doubling values as keys and subfolder names as values.
     """
-    unit_doublings_dict = {}
-
-    res_paths = get_result_paths(dataset, scaling_type)
-
-    for res in res_paths:
-        config_file = res / "config.json"
-        if config_file.exists():
-            with open(config_file, "r") as file:
-                config = json.load(file)
-                if "unit_doubling" in config:
-                    unit_doublings_value = config["unit_doubling"]
-                    unit_doublings_dict[unit_doublings_value] = res.name
-
-    return unit_doublings_dict
+    return catalog.unit_doublings(dataset, scaling_type.value, variant)
 
 
 #%%
@@ -58,9 +48,9 @@ conf_hash = "79"
 result_path = get_result_path(dataset, scaling_type, conf_hash)
 df_projects = get_project_data()
 
-df_lcoe = pd.read_csv(result_path / "lcoe_results.csv")
-df_inv = pd.read_csv(result_path / "investment_results.csv")
-df_npv = pd.read_csv(result_path / "npv_results.csv")
+df_lcoe = load_results(result_path, "lcoe")
+df_inv = load_results(result_path, "investment")
+df_npv = load_results(result_path, "npv")
 
 for col in df_inv.columns:
     ind = df_projects[df_projects["name"] == col].index[0]
@@ -72,7 +62,7 @@ for col in df_inv.columns:
 def get_norm_investment(dataset, scaling_type, conf_hash):
     result_path = get_result_path(dataset, scaling_type, conf_hash)
 
-    df_inv = pd.read_csv(result_path / "investment_results.csv")
+    df_inv = load_results(result_path, "investment")
 
     for col in df_inv.columns:
         ind = df_projects[df_projects["name"] == col].index[0]
@@ -125,13 +115,13 @@ scaling_type = ScalingOption.ROULSTONE
 
 result_path = get_result_path(dataset, scaling_type, conf_hash)
 
-df_lcoe = pd.read_csv(result_path / "lcoe_results.csv")
+df_lcoe = load_results(result_path, "lcoe")
 df_lcoe.describe().T
 
 
 # %%
 
-df_npv = pd.read_csv(result_path / "npv_results.csv")
+df_npv = load_results(result_path, "npv")
 df_npv.describe().T
 
 
@@ -159,7 +149,7 @@ conf_hash = "79"
 
 result_path = get_result_path(dataset, scaling_type, conf_hash)
 
-df_lcoe_steigerwald = pd.read_csv(result_path / "lcoe_results.csv")
+df_lcoe_steigerwald = load_results(result_path, "lcoe")
 df_lcoe_steigerwald.describe().T[["mean"]].round(2)
 
 unit_doublings = find_unit_doublings(dataset=dataset_adjusted, scaling_type=scaling_type)
@@ -169,7 +159,7 @@ lcoe_improve_unit_doublings = {}
 for i in unit_doublings:
     print(i)
     result_path = get_result_path(dataset_adjusted, scaling_type, conf_hash=unit_doublings[i])
-    df_lcoe = pd.read_csv(result_path / "lcoe_results.csv")
+    df_lcoe = load_results(result_path, "lcoe")
     lcoe_improve_unit_doublings[i] = df_lcoe.describe().T.round(2)
 
 
@@ -0,0 +1,63 @@
+import argparse
+import dataclasses
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.project import load_simulation_projects_from_yaml
+from smr_mcs.simulation_runner import BACKENDS, run_simulation_concurrent
+
+parser = argparse.ArgumentParser(
+    prog="Backend benchmark",
+    description="Compares the wall time of the process and thread backends of run_simulation_concurrent.",
+)
+parser.add_argument("-c", "--config", default="config/reference.yaml", help="path to yaml-file with the config.")
+parser.add_argument("-d", "--dataset", default="data/reference.yaml", help="path to yaml-file with the dataset.")
+parser.add_argument("-s", "--scaling", choices=[opt.value for opt in ScalingOption], default="roulstone")
+parser.add_argument("--samples", type=int, default=100_000, help="Number of samples per project.")
+parser.add_argument("-b", "--block-size", type=int, default=25_000, help="Samples per task, 0 for a task per project.")
+parser.add_argument("-k", "--kernel", default="reduced", help="Kernel of the config.")
+parser.add_argument(
+    "-w", "--workers", type=int, nargs="+", default=[1, 2, 4], help="Numbers of processes or threads to run."
+)
+parser.add_argument("-r", "--repeats", type=int, default=3, help="Runs per backend and number of workers.")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    pjs = load_simulation_projects_from_yaml(file_path=Path(args.dataset))
+    config = SimulationConfig.from_yaml(yaml_file=Path(args.config))
+    config = dataclasses.replace(
+        config,
+        n=args.samples,
+        opt_scaling=ScalingOption(args.scaling),
+        kernel=args.kernel,
+        block_size=args.block_size or None,
+    )
+    print(f"{os.cpu_count()} CPUs, {len(pjs)} projects with {config.n} samples, block size {config.block_size}")
+
+    rows = []
+    for workers in args.workers:
+        for backend in BACKENDS:
+            times = []
+            for _ in range(args.repeats):
+                start_time = datetime.now()
+                results = run_simulation_concurrent(pjs, config, workers, backend=backend)
+                times.append((datetime.now() - start_time).total_seconds())
+                del results
+            rows.append({"workers": workers, "backend": backend, "seconds": min(times)})
+            print(rows[-1])
+
+    df = pd.DataFrame(rows)
+    table = df.pivot(index="workers", columns="backend", values="seconds")
+    table["speedup"] = table["processes"] / table["threads"]
+    print("Best wall time in seconds, and the speedup of threads over processes:")
+    print(table.to_string(float_format="{:.2f}".format))
+
+    output_path = Path.cwd() / "results"
+    output_path.mkdir(exist_ok=True)
+    df.to_csv(output_path / "benchmark_backends.csv", index=False)
@@ -0,0 +1,85 @@
+import argparse
+import dataclasses
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.functions import mc_run
+from smr_mcs.project import load_simulation_projects_from_yaml
+
+parser = argparse.ArgumentParser(
+    prog="Sampling benchmark",
+    description="Compares the error of the mean and median LCOE versus n for the random, lhs and sobol sampling modes.",
+)
+parser.add_argument("-c", "--config", default="config/reference.yaml", help="path to yaml-file with the config.")
+parser.add_argument("-d", "--dataset", default="data/reference.yaml", help="path to yaml-file with the dataset.")
+parser.add_argument("-s", "--scaling", choices=[opt.value for opt in ScalingOption], default="roulstone")
+parser.add_argument("--min-exponent", type=int, default=10, help="Smallest n as a power of two.")
+parser.add_argument("--max-exponent", type=int, default=15, help="Largest n as a power of two.")
+parser.add_argument("-r", "--replications", type=int, default=8, help="Independent runs per mode and n.")
+parser.add_argument("--plot", action="store_true", help="Plot the error curves with matplotlib.")
+
+
+def standard_errors(pjs: list, config: SimulationConfig, sampling: str, n: int, replications: int) -> dict[str, float]:
+    """
+    Estimates the standard error of the mean and median LCOE of each project from independent replications, and
+    returns it relative to the estimate, averaged over the projects.
+    """
+    config = dataclasses.replace(config, n=n, sampling=sampling, chunk_size=None, kernel="reduced")
+    means, medians = [], []
+    for _ in range(replications):
+        lcoe = pd.DataFrame({pj.name: mc_run(config, pj, outputs=("lcoe",))["lcoe"] for pj in pjs})
+        means.append(lcoe.mean())
+        medians.append(lcoe.median())
+    means, medians = pd.DataFrame(means), pd.DataFrame(medians)
+    return {
+        "mean": float((means.std() / means.mean()).mean()),
+        "median": float((medians.std() / medians.mean()).mean()),
+    }
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    pjs = load_simulation_projects_from_yaml(file_path=Path(args.dataset))
+    config = SimulationConfig.from_yaml(yaml_file=Path(args.config))
+    config.opt_scaling = ScalingOption(args.scaling)
+
+    rows = []
+    for exponent in range(args.min_exponent, args.max_exponent + 1):
+        for sampling in ("random", "lhs", "sobol"):
+            start_time = datetime.now()
+            errors = standard_errors(pjs, config, sampling, 2**exponent, args.replications)
+            rows.append({"n": 2**exponent, "sampling": sampling, **errors})
+            print(rows[-1], f"{(datetime.now() - start_time).total_seconds():.1f} s")
+
+    df = pd.DataFrame(rows)
+    table = df.pivot(index="n", columns="sampling", values=["mean", "median"])
+    print("Relative standard error of the LCOE estimates, averaged over the projects:")
+    print(table.to_string(float_format="{:.2e}".format))
+
+    # Samples random sampling needs for the error of each mode, with the error decreasing as 1/sqrt(n)
+    for statistic in ("mean", "median"):
+        ratio = (table[statistic]["random"] / table[statistic][["lhs", "sobol"]].T).T ** 2
+        print(f"Equivalent sample size factor versus random sampling, {statistic} LCOE:")
+        print(ratio.to_string(float_format="{:.1f}".format))
+
+    output_path = Path.cwd() / "results"
+    output_path.mkdir(exist_ok=True)
+    df.to_csv(output_path / "benchmark_sampling.csv", index=False)
+
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        fig, axes = plt.subplots(1, 2, figsize=(10, 4), sharey=True)
+        for ax, statistic in zip(axes, ("mean", "median")):
+            for sampling in ("random", "lhs", "sobol"):
+                data = df[df["sampling"] == sampling]
+                ax.loglog(data["n"], data[statistic], marker="o", label=sampling)
+            ax.set_title(f"{statistic} LCOE")
+            ax.set_xlabel("n")
+        axes[0].set_ylabel("Relative standard error")
+        axes[0].legend()
+        fig.savefig(output_path / "benchmark_sampling.png", dpi=150, bbox_inches="tight")
@@ -1,47 +1,82 @@
-import subprocess as sp
+import dataclasses
+from pathlib import Path
+
+from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.parse_cache import ParseCache
+from smr_mcs.project import load_simulation_projects_from_yaml
+from smr_mcs.simulation_runner import get_result_path, is_complete, run_sweep, store_results
 
 scaling_options = ["manufacturer", "rothwell", "roulstone"]
 
+output_path = Path.cwd() / "results"
+
+# The sweeps share configs, which are only parsed once
+parse_cache = ParseCache()
+
+
+def sweep(
+    dataset: str,
+    config: str,
+    unit_doublings: list[int] | None = None,
+    force: bool = False,
+    num_processes: int = 2,
+):
+    """
+    Runs every scaling option and unit doubling of a dataset in one sweep (see ``run_sweep``), which simulates each
+    project once and shares the random numbers between the points. The cost components are stored, so sweeps over
+    further unit doublings are recombined from them without simulating. Points with stored results are not stored
+    again unless forced, and the sweep is skipped if all of them are stored.
+    """
+    simulation_projects = load_simulation_projects_from_yaml(file_path=Path(dataset), cache=parse_cache)
+    base_config = SimulationConfig.from_yaml(yaml_file=Path(config), cache=parse_cache)
+    unit_doublings = [base_config.unit_doubling] if unit_doublings is None else unit_doublings
+
+    def is_stored(point_config: SimulationConfig) -> bool:
+        return is_complete(get_result_path(output_path, simulation_projects, point_config, variant="components"))
+
+    points = [
+        dataclasses.replace(base_config, opt_scaling=ScalingOption(opt), unit_doubling=unit_doubling)
+        for opt in scaling_options
+        for unit_doubling in unit_doublings
+    ]
+    if not force and all(is_stored(point) for point in points):
+        print("All results are stored, skipping", dataset)
+        return
 
-def steigerwald():
-    for opt in scaling_options:
-        print(opt)
-        sp.run(
-            ["python", "scripts/run_mcs.py", "-p", "-s", opt],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-
-
-def adjusted():
-    scaling_options = ["manufacturer", "rothwell", "roulstone"]
-    unit_doublings = [1,2,3,4,5]
-
-    for opt in scaling_options:
-        for unit_doubling in unit_doublings:
-            print(opt, unit_doubling)
-            sp.run(
-                [
-                    "python",
-                    "scripts/run_mcs.py",
-                    "-p",
-                    "-s",
-                    opt,
-                    "-c",
-                    "config/adjusted.yaml",
-                    "-d",
-                    "data/adjusted.yaml",
-                    "-u",
-                    f"{unit_doubling}"
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
+    for point_config, npv_results, lcoe_results, inv_results in run_sweep(
+        simulation_projects,
+        base_config,
+        [ScalingOption(opt) for opt in scaling_options],
+        unit_doublings,
+        num_processes=num_processes,
+        output_path=output_path,
+        force=force,
+    ):
+        print(point_config.opt_scaling.value, point_config.unit_doubling)
+        if force or not is_stored(point_config):
+            store_results(
+                npv_results,
+                lcoe_results,
+                inv_results,
+                point_config,
+                output_path,
+                simulation_projects,
+                variant="components",
             )
 
 
+def steigerwald(force: bool = False):
+    """Runs the reference dataset, runs with stored results are skipped unless forced."""
+    sweep("data/reference.yaml", "config/reference.yaml", force=force)
+
+
+def adjusted(force: bool = False):
+    """Runs the adjusted dataset for each unit doubling, runs with stored results are skipped unless forced."""
+    unit_doublings = [1, 2, 3, 4, 5]
+    sweep("data/adjusted.yaml", "config/adjusted.yaml", unit_doublings, force=force)
+
+
 if __name__ == "__main__":
     steigerwald()
-    
-    adjusted()
\ No newline at end of file
+
+    adjusted()
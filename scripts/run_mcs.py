@@ -1,24 +1,130 @@
 import argparse
 import logging
+import shutil
+import sys
 from datetime import datetime
 from pathlib import Path
 from smr_mcs.distributions import Uniform
 
 from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.profiling import RunProfile
 from smr_mcs.project import load_simulation_projects_from_yaml
-from smr_mcs.simulation_runner import run_simulation, run_simulation_concurrent, store_results
+from smr_mcs.simulation_runner import (
+    get_checkpoint_path,
+    get_components_path,
+    get_result_path,
+    is_complete,
+    load_cached_results,
+    open_checkpoint,
+    plan_resources,
+    run_simulation,
+    run_simulation_concurrent,
+    run_simulation_stacked,
+    run_simulation_summary,
+    run_sweep,
+    store_results,
+    store_summaries,
+)
+
+
+def parse_memory(value: str) -> int:
+    """Parses a memory size such as 512M or 16G (binary units) into bytes."""
+    units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+    value = value.strip().upper().removesuffix("B").removesuffix("I")
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
 
 parser = argparse.ArgumentParser(
     prog="SMR Monte Carlo Simulator", description="Perform Monte Carlo simulation for SMR costs."
 )
 
 parser.add_argument("-p", "--parallel", action="store_true", help="Perform multiprocessing")
+parser.add_argument(
+    "-n",
+    "--num-processes",
+    type=int,
+    default=2,
+    help="Number of processes. Set block_size in the config to spread single projects over the processes.",
+)
 parser.add_argument(
     "-s", "--scaling", choices=["manufacturer", "rothwell", "roulstone"], help="SMR Cost scaling method"
 )
 parser.add_argument("-c", "--config", help="path to yaml-file with the config.", default="config/reference.yaml")
 parser.add_argument("-d", "--dataset", help="path to yaml-file with the dataset.", default="data/reference.yaml")
 parser.add_argument("-u", "--unit-doubling", help="How many doublings of each unit production.", default=1)
+parser.add_argument(
+    "-f",
+    "--format",
+    choices=["npy", "parquet", "csv"],
+    default="npy",
+    help="File format of the stored samples.",
+)
+parser.add_argument(
+    "--force", action="store_true", help="Rerun the simulation even if complete results for it are stored."
+)
+parser.add_argument(
+    "-m",
+    "--memory-budget",
+    type=parse_memory,
+    help="Memory budget, e.g. 16G. Limits the number of processes and the chunk size to fit.",
+)
+parser.add_argument(
+    "--summary-only",
+    action="store_true",
+    help="Only store summary statistics, computed chunk by chunk without keeping the samples in memory.",
+)
+parser.add_argument(
+    "--components",
+    action="store_true",
+    help="Store the per-sample cost components, such that runs with other scaling options or unit doublings are "
+    "recombined from them without simulating. Stored components are used whenever present, unless forced.",
+)
+parser.add_argument(
+    "-t",
+    "--target-ci-half-width",
+    type=float,
+    help="Target half-width of the 95%% confidence interval of the mean LCOE in USD/MWh. Each project stops once it "
+    "is reached, with n in the config as the maximum number of samples.",
+)
+parser.add_argument(
+    "--antithetic",
+    action="store_true",
+    help="Draw the wacc, electricity prices and loadfactors in antithetic pairs of consecutive samples. The stored "
+    "summaries then report the standard error of the means and the variance reduction, except with --components "
+    "and --stacked.",
+)
+parser.add_argument(
+    "--control-variates",
+    action="store_true",
+    help="Estimate the mean results with control variates. The stored summaries then report the standard error of "
+    "the means and the variance reduction. Not available with --components and --stacked.",
+)
+parser.add_argument(
+    "--stacked",
+    action="store_true",
+    help="Simulate all projects in one vectorized pass, with shared draws of the config parameters. Faster for small "
+    "n, ignored with --parallel.",
+)
+parser.add_argument(
+    "--backend",
+    choices=["processes", "threads"],
+    default="processes",
+    help="Execution backend of --parallel. Threads share the memory of the results without pickling.",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Record the wall time and bytes allocated per stage and the throughput per project and worker, logged and "
+    "stored as profile.json. Not available with --components and --stacked.",
+)
+parser.add_argument(
+    "--no-checkpoint",
+    action="store_true",
+    help="Do not save the results of each project as it finishes. By default, an interrupted run resumes from the "
+    "finished projects when restarted, unless forced.",
+)
 
 args = parser.parse_args()
 
@@ -73,21 +179,125 @@ if __name__ == "__main__":
     config = SimulationConfig.from_yaml(yaml_file=config_file)
     config.opt_scaling = opt_scaling
     config.unit_doubling = int(args.unit_doubling)
+    if args.target_ci_half_width is not None:
+        config.target_ci_half_width = args.target_ci_half_width
+    config.antithetic = config.antithetic or args.antithetic
+    config.control_variates = config.control_variates or args.control_variates
+    if config.control_variates and (args.components or args.stacked):
+        parser.error("Control variates are not available with --components and --stacked.")
+    profile = RunProfile() if args.profile else None
+    # Filled by the runners if the means are estimated with antithetic pairs or control variates
+    estimators = {}
+
+    if args.summary_only:
+        config_path = get_result_path(output_path, simulation_projects, config)
+        if is_complete(config_path) and not args.force:
+            logger.info("Found stored results in %s, skipping the simulation. Use --force to rerun.", config_path)
+            sys.exit(0)
+
+        num_processes = args.num_processes if args.parallel else 1
+        logger.info("Running simulation, keeping summary statistics only")
+        npv_summary, lcoe_summary, inv_summary = run_simulation_summary(
+            simulation_projects, config, num_processes, memory_budget=args.memory_budget, profile=profile
+        )
+        print(lcoe_summary.loc["mean"])
+
+        logger.info("Storing summary statistics")
+        store_summaries(npv_summary, lcoe_summary, inv_summary, config, output_path, simulation_projects, profile)
+        logger.info(f"Finished! Took {datetime.now()-start_time}")
+        sys.exit(0)
+
+    components_path = get_components_path(output_path, simulation_projects, config)
+    # The results recombined from components have no estimators of the means
+    stored_components = (
+        config.target_ci_half_width is None
+        and not config.control_variates
+        and not args.force
+        and is_complete(components_path)
+    )
+    # Runs recombined from components and stacked runs draw other samples and are stored under their own hash, the
+    # order follows the choice of the runner below
+    if args.components or stored_components:
+        variant = "components"
+    elif args.stacked and not args.parallel:
+        variant = "stacked"
+    else:
+        variant = None
+
+    cached_results = None if args.force else load_cached_results(output_path, simulation_projects, config, variant)
+    if cached_results is not None:
+        logger.info(
+            "Found stored results in %s, skipping the simulation. Use --force to rerun.",
+            get_result_path(output_path, simulation_projects, config, variant),
+        )
+        npv_results, lcoe_results, inv_results = cached_results
+        print(lcoe_results.mean())
+        logger.info(f"Finished! Took {datetime.now()-start_time}")
+        sys.exit(0)
 
     # Execute the simulation
     logger.info("Running simulation")
-    if args.parallel:
-        num_processes = 2  # Memory restrictive
-        logger.info("Concurrent simulation with %d processes", num_processes)
-        npv_results, lcoe_results, inv_results = run_simulation_concurrent(simulation_projects, config, num_processes)
+    checkpoint = None
+    if not (args.no_checkpoint or args.components or stored_components or args.stacked):
+        if args.force:
+            shutil.rmtree(get_checkpoint_path(output_path, simulation_projects, config), ignore_errors=True)
+        checkpoint = open_checkpoint(output_path, simulation_projects, config)
+        logger.info("Saving finished projects to the checkpoint in %s", checkpoint.path)
+
+    if args.components or stored_components:
+        logger.info("Recombining the results from the cost components in %s", components_path)
+        profile = None
+        ((_, npv_results, lcoe_results, inv_results),) = run_sweep(
+            simulation_projects,
+            config,
+            [config.opt_scaling],
+            [config.unit_doubling],
+            num_processes=args.num_processes if args.parallel else 1,
+            output_path=output_path,
+            force=args.force,
+        )
+    elif args.parallel:
+        num_processes = args.num_processes
+        logger.info("Concurrent simulation with %d %s", num_processes, args.backend)
+        npv_results, lcoe_results, inv_results = run_simulation_concurrent(
+            simulation_projects,
+            config,
+            num_processes,
+            memory_budget=args.memory_budget,
+            backend=args.backend,
+            profile=profile,
+            checkpoint=checkpoint,
+            estimators=estimators,
+        )
+    elif args.stacked:
+        logger.info("Stacked simulation")
+        profile = None
+        npv_results, lcoe_results, inv_results = run_simulation_stacked(simulation_projects, config)
     else:
         logger.info("Sequential simulation")
-        npv_results, lcoe_results, inv_results = run_simulation(simulation_projects, config)
+        if args.memory_budget is not None:
+            _, config = plan_resources(simulation_projects, config, 1, args.memory_budget)
+        npv_results, lcoe_results, inv_results = run_simulation(
+            simulation_projects, config, profile, checkpoint, estimators
+        )
 
     print(lcoe_results.mean())
     # logger.info("LCOE mean: ", lcoe_results.mean() )
     # logger.info("LCOE std: ", lcoe_results.std() )
 
     logger.info("Storing results")
-    store_results(npv_results, lcoe_results, inv_results, config, output_path, simulation_projects)
+    store_results(
+        npv_results,
+        lcoe_results,
+        inv_results,
+        config,
+        output_path,
+        simulation_projects,
+        result_format=args.format,
+        profile=profile,
+        estimators=estimators,
+        variant=variant,
+    )
+    if checkpoint is not None:
+        checkpoint.remove()
     logger.info(f"Finished! Took {datetime.now()-start_time}")
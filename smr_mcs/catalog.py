@@ -0,0 +1,258 @@
+import json
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from smr_mcs.result_store import MANIFEST
+
+CATALOG_FILE = "catalog.sqlite"
+SUMMARY_STATISTICS = ("count", "mean", "std", "min", "25%", "50%", "75%", "max")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    dataset_hash TEXT NOT NULL,
+    scaling TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    unit_doubling INTEGER,
+    n INTEGER,
+    path TEXT NOT NULL,
+    result_format TEXT,
+    config TEXT,
+    created TEXT,
+    UNIQUE (dataset_hash, scaling, config_hash)
+);
+CREATE INDEX IF NOT EXISTS runs_lookup ON runs (dataset_hash, scaling, unit_doubling);
+CREATE TABLE IF NOT EXISTS summaries (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    result TEXT NOT NULL,
+    project TEXT NOT NULL,
+    count REAL,
+    mean REAL,
+    std REAL,
+    min REAL,
+    p25 REAL,
+    p50 REAL,
+    p75 REAL,
+    max REAL,
+    PRIMARY KEY (run_id, result, project)
+);
+"""
+
+
+@dataclass(frozen=True)
+class RunRecord:
+    """
+    A stored run in the catalog.
+
+    :param dataset_hash: Hash of the dataset.
+    :param scaling: Scaling option.
+    :param config_hash: Hash of the config.
+    :param unit_doubling: Number of unit doublings.
+    :param n: Number of samples.
+    :param path: Directory of the run.
+    :param result_format: Format of the stored samples, None if the run was stored without samples.
+    """
+
+    dataset_hash: str
+    scaling: str
+    config_hash: str
+    unit_doubling: int
+    n: int
+    path: Path
+    result_format: str | None
+
+
+class RunCatalog:
+    """
+    Index of the runs stored in a results directory, kept in an SQLite database next to the runs. Lookups by
+    dataset, scaling option, unit doubling or config hash are answered from the index without scanning directories.
+
+    :param path: Path of the database file, usually ``<output_path>/catalog.sqlite``.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    def register(
+        self,
+        config_path: Path,
+        dataset_hash: str,
+        config_hash: str,
+        config: dict,
+        summaries: dict[str, pd.DataFrame],
+        result_format: str | None,
+    ):
+        """
+        Adds a run to the catalog, replacing an earlier entry for the same dataset, scaling option and config.
+
+        :param config_path: Directory of the run.
+        :param dataset_hash: Hash of the dataset.
+        :param config_hash: Hash of the config.
+        :param config: The config of the run, as from ``SimulationConfig.to_dict``.
+        :param summaries: Summary statistics as from ``DataFrame.describe``, by result ("npv", "lcoe", ...).
+        :param result_format: Format of the stored samples, None if the run was stored without samples.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM runs WHERE dataset_hash = ? AND scaling = ? AND config_hash = ?",
+                (dataset_hash, config["opt_scaling"], config_hash),
+            )
+            cursor = conn.execute(
+                "INSERT INTO runs (dataset_hash, scaling, config_hash, unit_doubling, n, path, result_format, config,"
+                " created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    dataset_hash,
+                    config["opt_scaling"],
+                    config_hash,
+                    config["unit_doubling"],
+                    config["n"],
+                    self._relative(config_path),
+                    result_format,
+                    json.dumps(config),
+                    datetime.now().isoformat(timespec="seconds"),
+                ),
+            )
+            run_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, result, str(project), *(float(summary.at[stat, project]) for stat in SUMMARY_STATISTICS))
+                    for result, summary in summaries.items()
+                    for project in summary.columns
+                ],
+            )
+
+    def find_runs(
+        self,
+        dataset: str | None = None,
+        scaling: str | None = None,
+        unit_doubling: int | None = None,
+        config_hash: str | None = None,
+    ) -> list[RunRecord]:
+        """
+        Finds the runs matching all given criteria.
+
+        :param dataset: Dataset hash.
+        :param scaling: Scaling option.
+        :param unit_doubling: Number of unit doublings.
+        :param config_hash: Config hash, or a prefix of it.
+        :return: Matching runs, oldest first.
+        """
+        conditions, parameters = [], []
+        for column, value in (("dataset_hash", dataset), ("scaling", scaling), ("unit_doubling", unit_doubling)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        if config_hash is not None:
+            conditions.append("substr(config_hash, 1, ?) = ?")
+            parameters.extend([len(config_hash), config_hash])
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT dataset_hash, scaling, config_hash, unit_doubling, n, path, result_format FROM runs"
+                f"{where} ORDER BY id",
+                parameters,
+            ).fetchall()
+        return [RunRecord(*row[:5], self.path.parent / row[5], row[6]) for row in rows]
+
+    def unit_doublings(self, dataset: str, scaling: str, variant: str | None = None) -> dict[int, str]:
+        """
+        Unit doublings stored for a dataset and scaling option.
+
+        :param variant: Variant of the runs, as stored in their config (see ``RUN_VARIANTS``), None for runs of
+            ``run_simulation``.
+        :return: Config hash of the run by number of unit doublings.
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT unit_doubling, config_hash FROM runs WHERE dataset_hash = ? AND scaling = ?"
+                " AND json_extract(config, '$.variant') IS ? ORDER BY id",
+                (dataset, scaling, variant),
+            ).fetchall()
+        return dict(rows)
+
+    def summary(self, run: RunRecord, result: str) -> pd.DataFrame:
+        """
+        Summary statistics of a run, in the layout of ``DataFrame.describe``.
+
+        :param run: The run.
+        :param result: "npv", "lcoe" or "investment".
+        """
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                "SELECT s.project, s.count, s.mean, s.std, s.min, s.p25, s.p50, s.p75, s.max FROM summaries s"
+                " JOIN runs r ON r.id = s.run_id"
+                " WHERE r.dataset_hash = ? AND r.scaling = ? AND r.config_hash = ? AND s.result = ? ORDER BY s.rowid",
+                conn,
+                params=(run.dataset_hash, run.scaling, run.config_hash, result),
+            )
+        return df.set_index("project").set_axis(list(SUMMARY_STATISTICS), axis=1).T
+
+    def index_directory(self, output_path: Path | None = None) -> int:
+        """
+        Adds the runs stored in a results directory that are not in the catalog yet, e.g. from before the catalog
+        existed.
+
+        :param output_path: Results directory, the directory of the catalog by default.
+        :return: Number of added runs.
+        """
+        output_path = self.path.parent if output_path is None else Path(output_path)
+        known = {run.path.resolve() for run in self.find_runs()}
+        added = 0
+        for config_file in output_path.glob("*/*/*/config.json"):
+            config_path = config_file.parent
+            if config_path.name.startswith(".") or config_path.resolve() in known:
+                continue
+            if not (config_path / "lcoe_summary.csv").exists():
+                # Not a run, e.g. stored components
+                continue
+            with open(config_file, "r") as file:
+                config = json.load(file)
+            summaries = {}
+            for result in ("npv", "lcoe", "investment"):
+                summary_file = config_path / f"{result}_summary.csv"
+                if summary_file.exists():
+                    summary = pd.read_csv(summary_file)
+                    # Older runs stored some summaries without the statistic names
+                    summary = summary.set_index(summary.columns[0]) if "mean" in summary.iloc[:, 0].values else summary
+                    # Summaries of variance-reduced runs have further rows after these
+                    summary = summary.iloc[: len(SUMMARY_STATISTICS)]
+                    summaries[result] = summary.set_axis(list(SUMMARY_STATISTICS), axis=0)
+            if (config_path / "lcoe_results" / MANIFEST).exists():
+                result_format = "npy"
+            elif (config_path / "lcoe_results.parquet").exists():
+                result_format = "parquet"
+            elif (config_path / "lcoe_results.csv").exists():
+                result_format = "csv"
+            else:
+                result_format = None
+            self.register(
+                config_path,
+                dataset_hash=config_path.parent.parent.name,
+                config_hash=config_path.name,
+                config=config,
+                summaries=summaries,
+                result_format=result_format,
+            )
+            added += 1
+        return added
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return str(Path(path).resolve().relative_to(self.path.parent.resolve()))
+        except ValueError:
+            return str(Path(path).resolve())
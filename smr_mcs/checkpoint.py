@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+# Describes the run a checkpoint belongs to, written when the checkpoint is created
+CHECKPOINT_MANIFEST = "checkpoint.json"
+# Entries of a task file saved as JSON next to the results
+STATE_KEYS = ("rng_states", "estimators")
+
+
+class RunCheckpoint:
+    """
+    Directory of the finished tasks of a run in progress, such that a restarted run only simulates the remaining
+    tasks. A task is a project, or a sample block of a project. Each task is written to its own ``.npz`` file as
+    soon as it finishes, which workers in other processes can do concurrently.
+
+    Every file is written under a temporary name and renamed into place, so a task file is either complete or
+    absent, and a crash never leaves a partial file that a restart would pick up. The manifest identifies the
+    dataset and config of the run. Opening a checkpoint of another run raises a ValueError.
+
+    :param path: Directory of the checkpoint.
+    :param manifest: Identifies the run, e.g. the dataset and config hashes and the projects.
+    """
+
+    def __init__(self, path: Path, manifest: dict) -> None:
+        self.path = Path(path)
+        self.manifest = manifest
+        manifest_file = self.path / CHECKPOINT_MANIFEST
+        if manifest_file.exists():
+            stored = json.loads(manifest_file.read_text())
+            if stored != manifest:
+                raise ValueError(f"The checkpoint in {self.path} belongs to another run.")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._atomic_write(manifest_file, lambda file: file.write(json.dumps(manifest, indent=4).encode()))
+
+    def _atomic_write(self, path: Path, write):
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as file:
+                write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _task_file(self, task: str) -> Path:
+        return self.path / f"{task}.npz"
+
+    def is_done(self, task: str) -> bool:
+        return self._task_file(task).exists()
+
+    def save(
+        self,
+        task: str,
+        results: dict[str, np.ndarray],
+        rng_states: list[dict] | None = None,
+        estimators: list[dict] | None = None,
+    ):
+        """
+        Saves the results of a finished task.
+
+        :param task: Name of the task, see ``task_name``.
+        :param results: Results of the task by output name.
+        :param rng_states: States of the random streams after the task (see ``rng_states``), to continue from.
+        :param estimators: Estimators of the means of the results (see ``MeanEstimator.to_dict``).
+        """
+        arrays = {key: np.asarray(values) for key, values in results.items()}
+        for key, state in (("rng_states", rng_states), ("estimators", estimators)):
+            if state is not None:
+                arrays[key] = np.array(json.dumps(state))
+        self._atomic_write(self._task_file(task), lambda file: np.savez(file, **arrays))
+
+    def load(self, task: str) -> tuple[dict[str, np.ndarray], list[dict] | None, list[dict] | None]:
+        """
+        Loads the results of a finished task.
+
+        :return: Results by output name, and the states of the random streams and the estimators if saved.
+        """
+        with np.load(self._task_file(task)) as data:
+            states = {key: json.loads(str(data[key])) for key in STATE_KEYS if key in data.files}
+            results = {key: data[key] for key in data.files if key not in STATE_KEYS}
+        return results, states.get("rng_states"), states.get("estimators")
+
+    def remove(self):
+        """Removes the checkpoint, once the results of the run are stored."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def task_name(column: int, block: int | None = None) -> str:
+    """Name of the task of the project with index ``column``, or of one of its sample blocks."""
+    return f"{column:03d}" if block is None else f"{column:03d}_{block:05d}"
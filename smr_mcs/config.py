@@ -1,12 +1,15 @@
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any, Self
+from typing import TYPE_CHECKING, Any, Self
 
 import yaml
 
 from smr_mcs.distributions import Degenerate, Distribution, Gaussian, Triangular, Uniform  # noqa
-from smr_mcs.project import create_distribution
+from smr_mcs.project import YAML_LOADER, create_distribution
+
+if TYPE_CHECKING:
+    from smr_mcs.parse_cache import ParseCache
 
 
 class ScalingOption(Enum):
@@ -26,6 +29,32 @@ class SimulationConfig:
     :param scaling: The distribution function to use for generating scaling factor values.
     :param opt_scaling: The scaling option to use for calculating investment costs.
     :param unit_doubling: How many times doubling of unit production has occured.
+    :param chunk_size: Optional number of samples simulated at a time. Bounds the peak memory of a run by the chunk
+        size instead of ``n``, without changing the results.
+    :param kernel: The cash-flow kernel used by ``mc_run``. "matrix" builds the yearly cash-flow matrices, "reduced"
+        computes the discounted sums directly and needs a fraction of the time and memory. "numba" walks the
+        timeline of each sample in a compiled loop, parallel over the samples, and falls back to "reduced" if numba
+        is not installed.
+    :param block_size: Optional number of samples per independent block. Each block draws from its own random
+        streams, spawned from the seeds of the distributions, so that the blocks can be simulated in parallel with
+        results that do not depend on the number of workers.
+    :param dtype: Precision of the yearly draws and cash-flow matrices, "float64" or "float32". Sums over time are
+        accumulated and results returned in float64. On the reference dataset, float32 changes the per-sample LCOE
+        by less than 1.5e-6 relative, the NPV by less than 4e-6 of its range, and the mean LCOE by less than 1e-7.
+    :param sampling: How the per-sample parameters and times are sampled: "random" draws them independently, "lhs"
+        from a Latin hypercube and "sobol" from a scrambled Sobol sequence, mapped through the inverse distribution
+        functions. The yearly draws stay random. The designs need scipy, and Sobol sequences are balanced for ``n``
+        (or ``block_size``) a power of two.
+    :param target_ci_half_width: Optional target for the half-width of the confidence interval of the mean LCOE
+        (USD/MWh). If set, the samples of each project are simulated chunk by chunk and the project stops once the
+        interval is narrower than the target, with ``n`` as the maximum number of samples. The results of a project
+        are then the first samples of the full run, and the number of samples differs between projects.
+    :param confidence_level: Confidence level of the interval for ``target_ci_half_width``.
+    :param antithetic: Whether the wacc, the electricity prices and the loadfactors are drawn in antithetic pairs of
+        consecutive samples (see ``Antithetic``). Even chunk and block sizes keep all samples paired.
+    :param control_variates: Whether the means of the summary statistics, and the convergence for
+        ``target_ci_half_width``, are estimated with the wacc and the mean loadfactor and electricity price over the
+        operating years as control variates (see ``MeanEstimator``). The samples are the same as without.
     """
 
     n: int
@@ -34,9 +63,18 @@ class SimulationConfig:
     scaling: Distribution
     opt_scaling: ScalingOption
     unit_doubling: int
+    chunk_size: int | None = None
+    kernel: str = "matrix"
+    block_size: int | None = None
+    dtype: str = "float64"
+    sampling: str = "random"
+    target_ci_half_width: float | None = None
+    confidence_level: float = 0.95
+    antithetic: bool = False
+    control_variates: bool = False
 
     def to_dict(self) -> dict[str, Any]:
-        return {
+        data = {
             "n": self.n,
             "wacc": self.wacc.to_dict(),
             "electricity_price": self.electricity_price.to_dict(),
@@ -44,6 +82,25 @@ class SimulationConfig:
             "opt_scaling": self.opt_scaling.value,
             "unit_doubling": self.unit_doubling,
         }
+        if self.chunk_size is not None:
+            data["chunk_size"] = self.chunk_size
+        if self.kernel != "matrix":
+            data["kernel"] = self.kernel
+        if self.block_size is not None:
+            data["block_size"] = self.block_size
+        if self.dtype != "float64":
+            data["dtype"] = self.dtype
+        if self.sampling != "random":
+            data["sampling"] = self.sampling
+        if self.target_ci_half_width is not None:
+            data["target_ci_half_width"] = self.target_ci_half_width
+        if self.confidence_level != 0.95:
+            data["confidence_level"] = self.confidence_level
+        if self.antithetic:
+            data["antithetic"] = self.antithetic
+        if self.control_variates:
+            data["control_variates"] = self.control_variates
+        return data
 
     def __str__(self):
         return self.__repr__()
@@ -57,12 +114,29 @@ class SimulationConfig:
             scaling=create_distribution(data["scaling"]),
             opt_scaling=ScalingOption(data["opt_scaling"]),
             unit_doubling=data["unit_doubling"],
+            chunk_size=data.get("chunk_size"),
+            kernel=data.get("kernel", "matrix"),
+            block_size=data.get("block_size"),
+            dtype=data.get("dtype", "float64"),
+            sampling=data.get("sampling", "random"),
+            target_ci_half_width=data.get("target_ci_half_width"),
+            confidence_level=data.get("confidence_level", 0.95),
+            antithetic=data.get("antithetic", False),
+            control_variates=data.get("control_variates", False),
         )
 
     @staticmethod
-    def from_yaml(yaml_file: Path) -> Self:
+    def from_yaml(yaml_file: Path, cache: "ParseCache | None" = None) -> Self:
+        """
+        Loads a config from YAML.
+
+        :param yaml_file: Path of the config.
+        :param cache: Cache of parsed files, which returns a copy of the config if the file was parsed before.
+        """
+        if cache is not None:
+            return cache.load(yaml_file, SimulationConfig.from_yaml)
         with open(yaml_file, "r") as file:
-            data = yaml.safe_load(file)
+            data = yaml.load(file, Loader=YAML_LOADER)
         return SimulationConfig.from_dict(data=data)
 
     def __eq__(self, other):
@@ -74,6 +148,15 @@ class SimulationConfig:
                 and self.scaling == other.scaling
                 and self.opt_scaling == other.opt_scaling
                 and self.unit_doubling == other.unit_doubling
+                and self.chunk_size == other.chunk_size
+                and self.kernel == other.kernel
+                and self.block_size == other.block_size
+                and self.dtype == other.dtype
+                and self.sampling == other.sampling
+                and self.target_ci_half_width == other.target_ci_half_width
+                and self.confidence_level == other.confidence_level
+                and self.antithetic == other.antithetic
+                and self.control_variates == other.control_variates
             )
         return False
 
@@ -1,3 +1,5 @@
+import copy
+import dataclasses
 from abc import ABCMeta
 from typing import Any, Self
 
@@ -8,7 +10,27 @@ class Distribution(metaclass=ABCMeta):
     def __init__(self) -> None:
         pass
 
-    def draw(self):
+    def draw(self, n_samples, dtype=np.float64):
+        """
+        Draws samples of the given shape. The samples are generated in double precision and rounded to ``dtype``, so
+        seeded draws agree across precisions.
+        """
+
+    def draw_into(self, out: np.ndarray) -> np.ndarray:
+        """
+        Draws samples into a preallocated array, consuming the random stream exactly as ``draw`` of the same shape.
+        Double-precision C-contiguous arrays are filled in place, others via a temporary array.
+        """
+        out[...] = self.draw(out.shape, dtype=out.dtype)
+        return out
+
+    def ppf(self, q: np.ndarray) -> np.ndarray:
+        """Inverse of the cumulative distribution function, maps uniform design points to samples."""
+
+    def expected_value(self) -> float:
+        """Mean of the distribution."""
+
+    def upper_bound(self) -> float:
         pass
 
     def to_dict(self) -> dict[str, Any]:
@@ -21,6 +43,90 @@ class Distribution(metaclass=ABCMeta):
     def __eq__(self, other: Any) -> bool:
         pass
 
+    def spawn(self, spawn_key: tuple[int, ...]) -> Self:
+        """
+        Returns a copy that draws from an independent random stream. The stream is the child of
+        ``np.random.SeedSequence(seed)`` with the given spawn key, i.e. ``SeedSequence(seed).spawn(i + 1)[i]`` for
+        ``spawn_key=(i,)``, so it is reproducible for seeded distributions.
+        """
+        child = copy.copy(self)
+        child.rng = np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=spawn_key))
+        return child
+
+
+def spawn_distributions(obj: Any, spawn_key: tuple[int, ...]) -> Any:
+    """
+    Returns a copy of a distribution, or of a dataclass holding distributions, where every distribution draws from
+    the independent stream given by ``spawn_key`` (see ``Distribution.spawn``).
+    """
+    if isinstance(obj, Distribution):
+        return obj.spawn(spawn_key)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        changes = {
+            field.name: spawn_distributions(getattr(obj, field.name), spawn_key) for field in dataclasses.fields(obj)
+        }
+        return dataclasses.replace(obj, **changes)
+    return obj
+
+
+def _random_distributions(obj: Any) -> list[Distribution]:
+    """Distributions with a random stream in a distribution, dataclass or list, in the order of the fields."""
+    if isinstance(obj, Distribution):
+        return [obj] if hasattr(obj, "rng") else []
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return [dist for field in dataclasses.fields(obj) for dist in _random_distributions(getattr(obj, field.name))]
+    if isinstance(obj, list):
+        return [dist for item in obj for dist in _random_distributions(item)]
+    return []
+
+
+def rng_states(obj: Any) -> list[dict]:
+    """
+    States of the random streams of a distribution, or of the distributions of a dataclass. Constant distributions
+    have no stream. Restored with ``set_rng_states``.
+    """
+    return [dist.rng.bit_generator.state for dist in _random_distributions(obj)]
+
+
+def set_rng_states(obj: Any, states: list[dict]):
+    """Restores the states of the random streams returned by ``rng_states``, in place."""
+    distributions = _random_distributions(obj)
+    if len(distributions) != len(states):
+        raise ValueError(f"Expected {len(distributions)} random states, got {len(states)}.")
+    for dist, state in zip(distributions, states):
+        dist.rng.bit_generator.state = state
+
+
+def reseed_unseeded(obj: Any):
+    """
+    Gives the unseeded distributions of a distribution, dataclass or list a fresh random stream from the OS entropy,
+    in place. A copy of an unseeded distribution, e.g. unpickled, would otherwise repeat the stream of the original.
+    """
+    for dist in _random_distributions(obj):
+        if dist.seed is None:
+            dist.rng = np.random.default_rng()
+
+
+def antithetic_distributions(obj: Any) -> Any:
+    """
+    Returns a copy of a distribution, or of a dataclass holding distributions, where every random distribution
+    draws antithetic pairs (see ``Antithetic``). The copies share the random streams of the originals.
+    """
+    if isinstance(obj, (Antithetic, Degenerate)):
+        return obj
+    if isinstance(obj, Distribution):
+        return Antithetic(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        changes = {field.name: antithetic_distributions(getattr(obj, field.name)) for field in dataclasses.fields(obj)}
+        return dataclasses.replace(obj, **changes)
+    return obj
+
+
+def _fillable(out: np.ndarray) -> bool:
+    """Whether the generators can fill an array in place."""
+    return out.dtype == np.float64 and out.flags.c_contiguous
+
+
 class Uniform(Distribution):
     def __init__(self, lower: float, upper: float, seed=None) -> None:
         self.seed = seed
@@ -28,8 +134,26 @@ class Uniform(Distribution):
         self.lower = lower
         self.upper = upper
 
-    def draw(self, n_samples) -> np.array:
-        return self.rng.uniform(low=self.lower, high=self.upper, size=n_samples)
+    def draw(self, n_samples, dtype=np.float64) -> np.array:
+        return self.rng.uniform(low=self.lower, high=self.upper, size=n_samples).astype(dtype, copy=False)
+
+    def draw_into(self, out: np.ndarray) -> np.ndarray:
+        if not _fillable(out):
+            return super().draw_into(out)
+        # Same operations as Generator.uniform
+        self.rng.random(out=out)
+        out *= self.upper - self.lower
+        out += self.lower
+        return out
+
+    def ppf(self, q: np.ndarray) -> np.ndarray:
+        return self.lower + (self.upper - self.lower) * np.asarray(q)
+
+    def expected_value(self) -> float:
+        return (self.lower + self.upper) / 2
+
+    def upper_bound(self) -> float:
+        return self.upper
 
     def to_dict(self) -> dict[str, Any]:
         return {"type": self.__class__.__name__, "lower": self.lower, "upper": self.upper, "seed": self.seed}
@@ -56,8 +180,29 @@ class Gaussian(Distribution):
         self.mean = mean
         self.std = std
 
-    def draw(self, n_samples) -> np.array:
-        return self.rng.normal(loc=self.mean, scale=self.std, size=n_samples)
+    def draw(self, n_samples, dtype=np.float64) -> np.array:
+        return self.rng.normal(loc=self.mean, scale=self.std, size=n_samples).astype(dtype, copy=False)
+
+    def draw_into(self, out: np.ndarray) -> np.ndarray:
+        if not _fillable(out):
+            return super().draw_into(out)
+        # Same operations as Generator.normal
+        self.rng.standard_normal(out=out)
+        out *= self.std
+        out += self.mean
+        return out
+
+    def ppf(self, q: np.ndarray) -> np.ndarray:
+        from scipy.special import ndtri
+
+        return self.mean + self.std * ndtri(q)
+
+    def expected_value(self) -> float:
+        return self.mean
+
+    def upper_bound(self) -> float:
+        # Practical bound, exceeded with a probability of about 1e-9
+        return self.mean + 6 * self.std
 
     def to_dict(self) -> dict[str, Any]:
         return {"type": "Gaussian", "mean": self.mean, "std": self.std, "seed": self.seed}
@@ -84,8 +229,38 @@ class Triangular(Distribution):
         self.mode = mode
         self.right = right
 
-    def draw(self, n_samples) -> np.array:
-        return self.rng.triangular(left=self.left, mode=self.mode, right=self.right, size=n_samples)
+    def draw(self, n_samples, dtype=np.float64) -> np.array:
+        samples = self.rng.triangular(left=self.left, mode=self.mode, right=self.right, size=n_samples)
+        return samples.astype(dtype, copy=False)
+
+    def draw_into(self, out: np.ndarray) -> np.ndarray:
+        if not _fillable(out):
+            return super().draw_into(out)
+        # Inverse transform with the same operations as Generator.triangular
+        base = self.right - self.left
+        left_base = self.mode - self.left
+        self.rng.random(out=out)
+        upper = out > left_base / base
+        out[~upper] = self.left + np.sqrt(out[~upper] * (left_base * base))
+        out[upper] = self.right - np.sqrt((1.0 - out[upper]) * ((self.right - self.mode) * base))
+        return out
+
+    def ppf(self, q: np.ndarray) -> np.ndarray:
+        q = np.asarray(q)
+        base = self.right - self.left
+        left_base = self.mode - self.left
+        with np.errstate(invalid="ignore"):
+            return np.where(
+                q <= left_base / base,
+                self.left + np.sqrt(q * (left_base * base)),
+                self.right - np.sqrt((1.0 - q) * ((self.right - self.mode) * base)),
+            )
+
+    def expected_value(self) -> float:
+        return (self.left + self.mode + self.right) / 3
+
+    def upper_bound(self) -> float:
+        return self.right
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -118,8 +293,18 @@ class Degenerate(Distribution):
     def __init__(self, value: int | float) -> None:
         self.value = float(value)
 
-    def draw(self, n_samples) -> np.ndarray:
-        return self.value * np.ones(shape=(n_samples,))
+    def draw(self, n_samples, dtype=np.float64) -> np.ndarray:
+        return np.full(n_samples, self.value, dtype=dtype)
+
+    def draw_into(self, out: np.ndarray) -> np.ndarray:
+        out.fill(self.value)
+        return out
+
+    def expected_value(self) -> float:
+        return self.value
+
+    def upper_bound(self) -> float:
+        return self.value
 
     def to_dict(self) -> dict[str, Any]:
         return {"type": self.__class__.__name__, "value": self.value}
@@ -136,3 +321,53 @@ class Degenerate(Distribution):
             return self.value == other.value
 
         return False
+
+    def spawn(self, spawn_key: tuple[int, ...]) -> Self:
+        return self
+
+
+class Antithetic(Distribution):
+    """
+    Draws a distribution in antithetic pairs: consecutive samples along the first axis are mapped through the
+    inverse distribution function from a uniform ``u`` and from ``1 - u``. The pairs are negatively correlated, so
+    the mean of monotone functions of the samples has a lower variance than from independent draws. Only half of the
+    uniforms are drawn from the random stream, which is shared with the wrapped distribution.
+
+    A pair is only complete within one draw, so arrays with an even number of samples along the first axis keep all
+    samples paired.
+
+    :param distribution: The distribution to draw from.
+    """
+
+    def __init__(self, distribution: Distribution) -> None:
+        self.distribution = distribution
+        self.seed = distribution.seed
+        self.rng = distribution.rng
+
+    def draw(self, n_samples, dtype=np.float64) -> np.ndarray:
+        shape = tuple(np.atleast_1d(n_samples))
+        uniforms = self.rng.random(((shape[0] + 1) // 2, *shape[1:]))
+        q = np.empty((2 * len(uniforms), *shape[1:]))
+        q[0::2] = uniforms
+        q[1::2] = 1.0 - uniforms
+        return self.distribution.ppf(q[: shape[0]]).astype(dtype, copy=False)
+
+    def ppf(self, q: np.ndarray) -> np.ndarray:
+        return self.distribution.ppf(q)
+
+    def expected_value(self) -> float:
+        return self.distribution.expected_value()
+
+    def upper_bound(self) -> float:
+        return self.distribution.upper_bound()
+
+    def to_dict(self) -> dict[str, Any]:
+        return self.distribution.to_dict()
+
+    def __repr__(self):
+        return self.__class__.__name__ + f"({self.distribution!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, Antithetic):
+            return self.distribution == other.distribution
+        return False
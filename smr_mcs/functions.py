@@ -1,31 +1,180 @@
+import dataclasses
 import sys
+from collections.abc import Iterator
+from logging import getLogger
 
 import numpy as np
 
 from smr_mcs.config import ScalingOption, SimulationConfig
-from smr_mcs.distributions import Uniform
+from smr_mcs.distributions import (
+    Degenerate,
+    Distribution,
+    Uniform,
+    antithetic_distributions,
+    spawn_distributions,
+)
+from smr_mcs.profiling import StageProfiler
 from smr_mcs.project import SimulationProject, load_simulation_projects_from_yaml
+from smr_mcs.sampling import SAMPLING_MODES, SamplingPlan
+from smr_mcs.statistics import MeanEstimator
 
+logger = getLogger(__name__)
 
-def get_rand_investment(pj: SimulationProject, config: SimulationConfig, plant_capacity: np.ndarray):
-    learning_rate = (1 - pj.learning_factor.draw(config.n)) ** float(config.unit_doubling)
-    reference_capacity = pj.reference_pj.capacity.draw(config.n)
-    if config.opt_scaling == ScalingOption.MANUFACTURER:
-        rand_investment = pj.investment.draw(config.n) * plant_capacity * learning_rate
-    elif config.opt_scaling == ScalingOption.ROULSTONE:
-        beta = config.scaling.draw(config.n)
+PER_SAMPLE_OUTPUTS = ("wacc", "investment", "npv", "lcoe")
+MATRIX_OUTPUTS = ("disc_cash_out", "disc_cash_net", "disc_electricity", "electricity_price", "loadfactor")
+# Present values per sample that do not depend on the scaling option and the unit doubling, see ``recombine``
+COMPONENT_OUTPUTS = ("plant_capacity", "pv_capex_factor", "pv_opex", "pv_revenue", "pv_electricity")
+# Parameters of the investment costs, see ``draw_investment_drivers``
+INVESTMENT_DRIVERS = (
+    "learning_factor",
+    "reference_capacity",
+    "specific_investment",
+    "scaling",
+    "reference_specific_investment",
+)
+# Per-sample quantities with known expectations, see ``mean_estimator``
+CONTROL_VARIATES = ("wacc", "mean_loadfactor", "mean_electricity_price")
+# Convergence of runs with a ``target_ci_half_width`` is checked after chunks of this size, unless ``chunk_size``
+# is set, and not before this many samples
+ADAPTIVE_CHUNK_SIZE = 10_000
+MIN_ADAPTIVE_SAMPLES = 1_000
+# Default profiler of the kernels, which records nothing
+NO_PROFILER = StageProfiler(enabled=False)
+
+
+def _draw(distribution: Distribution, size: int | tuple[int, ...], dtype=np.float64) -> np.ndarray | float:
+    """Draws samples of a distribution, constant (Degenerate) distributions are returned as a scalar."""
+    if isinstance(distribution, Degenerate):
+        return distribution.value
+    return distribution.draw(size, dtype=dtype)
+
+
+def _draw_time(distribution: Distribution, n: int) -> np.ndarray | int:
+    """Draws whole years, constant times are returned as a scalar."""
+    if isinstance(distribution, Degenerate):
+        return int(distribution.value)
+    return distribution.draw(n).astype(int)
+
+
+def _rows(values: np.ndarray | float, start: int, stop: int) -> np.ndarray | float:
+    """Samples of a chunk, scalars are left as is."""
+    return values[start:stop] if np.ndim(values) else values
+
+
+def _design_time(values: np.ndarray | float) -> np.ndarray | int:
+    """Whole years from design samples, as ``_draw_time``."""
+    return values.astype(int) if np.ndim(values) else int(values)
+
+
+def _column(values: np.ndarray | float, dtype=None) -> np.ndarray | float:
+    """Per-sample values as a column to broadcast over time, scalars are left as is."""
+    return np.asarray(values, dtype=dtype)[:, np.newaxis] if np.ndim(values) else values
+
+
+def _full(values: np.ndarray | float, shape: int | tuple[int, ...]) -> np.ndarray:
+    """Materializes scalar results to the full per-sample shape."""
+    return np.full(shape, values) if np.ndim(values) == 0 else values
+
+
+def get_rand_investment(
+    pj: SimulationProject, config: SimulationConfig, plant_capacity: np.ndarray, n_samples: int | None = None
+):
+    """
+    Draws the investment costs [USD] according to the scaling option of the config. Returns a scalar if all the
+    involved parameters are constant.
+    """
+    n_samples = config.n if n_samples is None else n_samples
+    drivers = draw_investment_drivers(pj, config, n_samples)
+    return investment_cost(drivers, plant_capacity, config.opt_scaling, config.unit_doubling)
+
+
+def draw_investment_drivers(
+    pj: SimulationProject,
+    config: SimulationConfig,
+    n_samples: int,
+    scaling_options: tuple[ScalingOption, ...] | None = None,
+) -> dict:
+    """
+    Draws the parameters of the investment costs (see ``INVESTMENT_DRIVERS``) needed for the given scaling options,
+    the scaling option of the config by default. Constant parameters are returned as scalars.
+
+    :param pj: Project instance.
+    :param config: Simulation config.
+    :param n_samples: Number of samples.
+    :param scaling_options: Scaling options the investment costs are computed for.
+    :return: Dictionary of the drawn parameters.
+    """
+    scaling_options = (config.opt_scaling,) if scaling_options is None else scaling_options
+    return SamplingPlan(_investment_distributions(pj, config, scaling_options)).draw(n_samples)
+
+
+def _investment_distributions(
+    pj: SimulationProject, config: SimulationConfig, scaling_options: tuple[ScalingOption, ...]
+) -> dict[str, Distribution]:
+    distributions = {"learning_factor": pj.learning_factor, "reference_capacity": pj.reference_pj.capacity}
+    if ScalingOption.MANUFACTURER in scaling_options:
+        distributions["specific_investment"] = pj.investment
+    if ScalingOption.ROULSTONE in scaling_options or ScalingOption.ROTHWELL in scaling_options:
+        distributions["scaling"] = config.scaling
+        distributions["reference_specific_investment"] = pj.reference_pj.investment
+    return distributions
+
+
+def sampling_plan(
+    config: SimulationConfig, pj: SimulationProject, scaling_options: tuple[ScalingOption, ...] | None = None
+) -> SamplingPlan:
+    """
+    Compiles the draws of the per-sample parameters of a project: the plant capacity, the wacc, the investment
+    drivers of the given scaling options (the one of the config by default) and the O&M costs.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param scaling_options: Scaling options the investment drivers are drawn for.
+    :return: Sampling plan, filling one ``(parameters, n)`` array per draw.
+    """
+    scaling_options = (config.opt_scaling,) if scaling_options is None else scaling_options
+    return SamplingPlan(
+        {
+            "plant_capacity": pj.plant_capacity,
+            "wacc": config.wacc,
+            **_investment_distributions(pj, config, scaling_options),
+            "operating_cost_fixed": pj.operating_cost.fixed,
+            "operating_cost_variable": pj.operating_cost.variable,
+            "operating_cost_fuel": pj.operating_cost.fuel,
+        }
+    )
+
+
+def investment_cost(
+    drivers: dict, plant_capacity: np.ndarray | float, opt_scaling: ScalingOption, unit_doubling: int
+) -> np.ndarray | float:
+    """
+    Computes the investment costs [USD] for a scaling option and number of unit doublings.
+
+    :param drivers: Parameters of the investment costs, as from ``draw_investment_drivers``.
+    :param plant_capacity: Plant capacity [MW].
+    :param opt_scaling: Scaling option.
+    :param unit_doubling: Number of unit doublings.
+    :return: Investment costs.
+    """
+    learning_rate = (1 - drivers["learning_factor"]) ** float(unit_doubling)
+    reference_capacity = drivers["reference_capacity"]
+    if opt_scaling == ScalingOption.MANUFACTURER:
+        rand_investment = drivers["specific_investment"] * plant_capacity * learning_rate
+    elif opt_scaling == ScalingOption.ROULSTONE:
+        beta = drivers["scaling"]
         rand_investment = (
-            pj.reference_pj.investment.draw(config.n)
+            drivers["reference_specific_investment"]
             * reference_capacity
             * learning_rate
             * (plant_capacity / reference_capacity) ** beta
         )
-    elif config.opt_scaling == ScalingOption.ROTHWELL:
-        beta = config.scaling.draw(config.n)
+    elif opt_scaling == ScalingOption.ROTHWELL:
+        beta = drivers["scaling"]
         # gamma = np.power(2, beta - 1) # NB:
         gamma = beta
         rand_investment = (
-            pj.reference_pj.investment.draw(config.n)
+            drivers["reference_specific_investment"]
             * reference_capacity
             * learning_rate
             * (plant_capacity / reference_capacity) ** (1 + np.log2(gamma))
@@ -35,72 +184,927 @@ def get_rand_investment(pj: SimulationProject, config: SimulationConfig, plant_c
     return rand_investment
 
 
-def mc_run(config: SimulationConfig, pj: SimulationProject) -> dict:
+def mc_run(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    outputs: tuple[str, ...] = PER_SAMPLE_OUTPUTS,
+    profiler: StageProfiler = NO_PROFILER,
+) -> dict:
     """
     Performs a Monte Carlo simulation for an investment project.
 
+    The cash flows are evaluated by the kernel selected with ``config.kernel`` (see ``KERNELS``). If
+    ``config.chunk_size`` is set, the samples are processed in blocks of that size. Each distribution is drawn in
+    the same order as in a single-shot run, so the results are identical for seeded distributions. If
+    ``config.block_size`` is set, the sample blocks are simulated one after another with ``mc_run_block``. If
+    ``config.target_ci_half_width`` is set, the simulation stops after the first chunk at which the mean LCOE has
+    converged, and fewer than ``config.n`` samples are returned. If ``config.antithetic`` is set, the wacc, the
+    electricity prices and the loadfactors are drawn in antithetic pairs of consecutive samples (see ``_antithetic``).
+
+    Constant (Degenerate) parameters are not drawn but broadcast as scalars. If the construction and operating times
+    are constant, the timeline is the same for all samples and the kernels use plain slices instead of masks.
+
+    Only the requested outputs are returned. The per-sample results (``PER_SAMPLE_OUTPUTS``) are the default, the
+    ``(n, time)`` matrices in ``MATRIX_OUTPUTS`` are meant for debugging. The discounted cash-flow matrices are only
+    built by the matrix kernel, which is then used regardless of ``config.kernel``.
+
     :param config: Simulation config.
     :param pj: Project instance.
+    :param outputs: Names of the results to return.
+    :param profiler: Records the wall time and the bytes allocated by the stages of the kernels, and the throughput.
     :return: Dictionary of simulation results.
     """
-    construction_time = pj.time.construction.draw(config.n).astype(int)
-    operating_time = pj.time.operating.draw(config.n).astype(int)
-    total_time = construction_time + operating_time
-    max_time = int(max(total_time))
-    max_operational_time = int(max(operating_time))
-
-    plant_capacity = pj.plant_capacity.draw(config.n)
-
-    wacc = config.wacc.draw(config.n)
-    electricity_price = config.electricity_price.draw((config.n, max_operational_time))
-    loadfactor = pj.loadfactor.draw((config.n, max_operational_time))
-
-    investment = get_rand_investment(pj, config=config, plant_capacity=plant_capacity)
-
-    operating_cost_fix = plant_capacity * pj.operating_cost.fixed.draw(config.n)
-    operating_cost_variable = pj.operating_cost.variable.draw(config.n) + pj.operating_cost.fuel.draw(config.n)
-
-    cash_in = np.zeros((config.n, max_time))
-    cash_out = np.zeros((config.n, max_time))
-    cash_net = np.zeros((config.n, max_time))
-    disc_cash_out = np.zeros((config.n, max_time))
-    disc_cash_net = np.zeros((config.n, max_time))
-    electricity = np.zeros((config.n, max_time))
-    disc_electricity = np.zeros((config.n, max_time))
-
-    time_indices = np.arange(max_time)
-    construction_mask = time_indices < construction_time[:, None]
-    operation_end_time = construction_time + operating_time
-    operation_mask = (time_indices >= construction_time[:, None]) & (time_indices < operation_end_time[:, None])
-
-    # Construction stage
-    cash_out[construction_mask] = (investment / construction_time).repeat(construction_time)
-
-    # Operational stage
-    electricity[operation_mask] = (plant_capacity[:, np.newaxis] * loadfactor * 8760).flatten()
-    cash_in[operation_mask] = electricity_price.flatten() * electricity[operation_mask]
-    cash_out[operation_mask] = (
-        operating_cost_fix.repeat(operating_time)
-        + operating_cost_variable.repeat(operating_time) * electricity[operation_mask]
+    chunks = list(mc_run_chunks(config, pj, outputs, profiler))
+    if len(chunks) == 1:
+        return chunks[0]
+    return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in outputs}
+
+
+def mc_run_chunks(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    outputs: tuple[str, ...] = PER_SAMPLE_OUTPUTS,
+    profiler: StageProfiler = NO_PROFILER,
+) -> Iterator[dict]:
+    """
+    Performs the Monte Carlo simulation of ``mc_run``, yielding the results chunk by chunk (per ``config.chunk_size``
+    and ``config.block_size``) instead of concatenating them. Consumers that reduce the samples, e.g. to summary
+    statistics, then only hold a chunk of the results at a time.
+
+    If ``config.target_ci_half_width`` is set, the chunks (of ``config.chunk_size``, or ``ADAPTIVE_CHUNK_SIZE``
+    samples) stop once the confidence interval of the mean LCOE of the samples so far is narrower than the target.
+    The interval is that of the ``mean_estimator`` of the config, i.e. with control variates and antithetic pairs.
+    The stopping point is reproducible for seeded distributions. The samples are then the first samples of a run with
+    the full ``config.n``, except that the distributions of the config continue where the previous project stopped.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param outputs: Names of the results to return.
+    :param profiler: Records the stages of the kernels and the throughput, see ``StageProfiler``.
+    :return: Iterator over the simulation results of consecutive chunks of samples.
+    """
+    unknown = set(outputs) - set(
+        PER_SAMPLE_OUTPUTS + MATRIX_OUTPUTS + COMPONENT_OUTPUTS + INVESTMENT_DRIVERS + CONTROL_VARIATES
+    )
+    if unknown:
+        raise ValueError(f"Unknown outputs: {sorted(unknown)}.")
+    if config.kernel not in KERNELS:
+        raise ValueError(f"Unknown kernel: {config.kernel}. Choose from {list(KERNELS)}.")
+    if config.sampling not in SAMPLING_MODES:
+        raise ValueError(f"Unknown sampling: {config.sampling}. Choose from {SAMPLING_MODES}.")
+    if any(key.startswith("disc_") for key in outputs) and set(outputs) & set(COMPONENT_OUTPUTS + INVESTMENT_DRIVERS):
+        raise ValueError("The discounted cash-flow matrices and the cost components cannot be returned together.")
+    target = config.target_ci_half_width
+    if target is not None:
+        if target <= 0:
+            raise ValueError(f"target_ci_half_width must be positive, got {target}.")
+        if not 0 < config.confidence_level < 1:
+            raise ValueError(f"confidence_level must be between 0 and 1, got {config.confidence_level}.")
+        if config.block_size is not None:
+            raise ValueError("Runs with a target_ci_half_width stop after any chunk and cannot be split into blocks.")
+
+    if config.block_size is not None:
+        for block in range(len(sample_blocks(config))):
+            yield from mc_run_chunks(*spawn_block(config, pj, block), outputs, profiler)
+        return
+    if config.antithetic:
+        config, (pj,) = _antithetic(config, [pj])
+
+    kernel = KERNELS[config.kernel]
+    if any(key.startswith("disc_") for key in outputs):
+        kernel = _matrix_kernel
+    elif set(outputs) & set(COMPONENT_OUTPUTS + INVESTMENT_DRIVERS):
+        kernel = _reduced_kernel
+
+    with profiler.stage("sampling"):
+        if config.sampling == "random":
+            design = None
+            construction_time = _draw_time(pj.time.construction, config.n)
+            operating_time = _draw_time(pj.time.operating, config.n)
+        else:
+            design = _draw_design(config, pj)
+            construction_time = _design_time(design.pop("construction_time"))
+            operating_time = _design_time(design.pop("operating_time"))
+    profiler.allocated("sampling", design, construction_time, operating_time)
+    max_time = int(np.max(construction_time + operating_time))
+    max_operational_time = int(np.max(operating_time))
+
+    chunk_size = config.chunk_size
+    if target is not None and chunk_size is None:
+        chunk_size = ADAPTIVE_CHUNK_SIZE
+    if chunk_size is None or chunk_size >= config.n:
+        with profiler.samples_of(config.n):
+            results = kernel(
+                config,
+                pj,
+                config.n,
+                construction_time,
+                operating_time,
+                max_time,
+                max_operational_time,
+                outputs,
+                design=design,
+                profiler=profiler,
+            )
+        yield results
+        return
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}.")
+
+    # The yearly draws of consecutive chunks are filled into the same arrays, unless they are returned
+    buffers = None if {"electricity_price", "loadfactor"} & set(outputs) else {}
+    # The LCOE and the control variates are needed to check the convergence of adaptive runs, even if not returned
+    kernel_outputs = outputs
+    if target is not None:
+        kernel_outputs = (*outputs, *(key for key in ("lcoe", *control_outputs(config)) if key not in outputs))
+    lcoe = mean_estimator(config, pj)
+    for start in range(0, config.n, chunk_size):
+        stop = min(start + chunk_size, config.n)
+        with profiler.samples_of(stop - start):
+            chunk = kernel(
+                config,
+                pj,
+                stop - start,
+                _rows(construction_time, start, stop),
+                _rows(operating_time, start, stop),
+                max_time,
+                max_operational_time,
+                kernel_outputs,
+                buffers,
+                None if design is None else {key: _rows(values, start, stop) for key, values in design.items()},
+                profiler,
+            )
+            if buffers:
+                chunk = _copy_buffered(chunk, buffers)
+        if target is None:
+            yield chunk
+            continue
+        lcoe.update(chunk["lcoe"], control_values(config, chunk))
+        yield {key: chunk[key] for key in outputs}
+        half_width = lcoe.ci_half_width(config.confidence_level)
+        if stop < config.n and lcoe.samples.count >= MIN_ADAPTIVE_SAMPLES and half_width <= target:
+            logger.info(f"Mean LCOE of {pj.name} converged after {stop} samples, half-width {half_width:.3g}.")
+            return
+
+
+def _antithetic(
+    config: SimulationConfig, pjs: list[SimulationProject]
+) -> tuple[SimulationConfig, list[SimulationProject]]:
+    """
+    Copies of the config and the projects whose wacc, electricity prices and loadfactors draw antithetic pairs (see
+    ``Antithetic``). The times, which are rounded to whole years, and the other parameters are drawn independently,
+    so their distributions are unchanged.
+    """
+    config = dataclasses.replace(
+        config,
+        wacc=antithetic_distributions(config.wacc),
+        electricity_price=antithetic_distributions(config.electricity_price),
     )
+    return config, [dataclasses.replace(pj, loadfactor=antithetic_distributions(pj.loadfactor)) for pj in pjs]
+
 
-    discount = 1 / ((1 + wacc[:, np.newaxis]) ** (np.arange(max_time)))
-    disc_electricity = electricity * discount
-    cash_net = cash_in - cash_out
-    disc_cash_out = cash_out * discount
-    disc_cash_net = cash_net * discount
+def control_outputs(config: SimulationConfig) -> tuple[str, ...]:
+    """Outputs needed for the ``mean_estimator`` of a config, in addition to the estimated result."""
+    return CONTROL_VARIATES if config.control_variates else ()
 
+
+def control_values(config: SimulationConfig, results: dict) -> np.ndarray | None:
+    """Control variates of the ``mean_estimator`` of a config from the results of a chunk, as ``(n, controls)``."""
+    if not config.control_variates:
+        return None
+    return np.column_stack([results[key] for key in CONTROL_VARIATES])
+
+
+def mean_estimator(config: SimulationConfig, pj: SimulationProject) -> MeanEstimator:
+    """
+    Estimator of the mean of a per-sample result of a run. With ``config.control_variates`` the estimator uses the
+    ``CONTROL_VARIATES``, with their expectations from the distributions of the wacc, the loadfactor and the
+    electricity price. With ``config.antithetic`` consecutive samples are averaged as antithetic pairs.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :return: Estimator to update with the results of ``control_outputs`` and ``control_values`` of each chunk.
+    """
+    expectations = ()
+    if config.control_variates:
+        expectations = (
+            config.wacc.expected_value(),
+            pj.loadfactor.expected_value(),
+            config.electricity_price.expected_value(),
+        )
+    return MeanEstimator(expectations, paired=config.antithetic)
+
+
+def sample_blocks(config: SimulationConfig) -> list[tuple[int, int]]:
+    """
+    Splits the samples into the independent blocks given by ``config.block_size``.
+
+    :param config: Simulation config.
+    :return: List of (start, stop) sample indices.
+    """
+    block_size = config.n if config.block_size is None else config.block_size
+    if block_size < 1:
+        raise ValueError(f"block_size must be a positive integer, got {block_size}.")
+    return [(start, min(start + block_size, config.n)) for start in range(0, config.n, block_size)]
+
+
+def spawn_block(
+    config: SimulationConfig, pj: SimulationProject, block: int
+) -> tuple[SimulationConfig, SimulationProject]:
+    """
+    Config and project of one sample block (see ``sample_blocks``), where all distributions draw from the streams
+    spawned for the block index.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param block: Index of the sample block.
+    :return: Config with the number of samples of the block, and the project.
+    """
+    start, stop = sample_blocks(config)[block]
+    block_config = dataclasses.replace(spawn_distributions(config, (block,)), n=stop - start, block_size=None)
+    return block_config, spawn_distributions(pj, (block,))
+
+
+def mc_run_block(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    block: int,
+    outputs: tuple[str, ...] = PER_SAMPLE_OUTPUTS,
+    profiler: StageProfiler = NO_PROFILER,
+) -> dict:
+    """
+    Performs the Monte Carlo simulation of one sample block (see ``sample_blocks``).
+
+    All distributions of the config and the project draw from the stream spawned for the block index, so a block
+    gives the same results regardless of which worker simulates it and in which order.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param block: Index of the sample block.
+    :param outputs: Names of the results to return.
+    :param profiler: Records the stages of the kernels and the throughput, see ``StageProfiler``.
+    :return: Dictionary of simulation results for the samples of the block.
+    """
+    return mc_run(*spawn_block(config, pj, block), outputs, profiler)
+
+
+# Parameters of the config, drawn once per chunk and shared by all projects of ``mc_run_projects``
+SHARED_PARAMETERS = ("wacc", "scaling")
+
+
+def mc_run_projects(
+    config: SimulationConfig, pjs: list[SimulationProject], outputs: tuple[str, ...] = ("npv", "lcoe", "investment")
+) -> dict[str, np.ndarray]:
+    """
+    Performs the Monte Carlo simulation of several projects in one vectorized pass, with the projects stacked on
+    the first axis of ``(n_projects, n, time)`` arrays padded to the longest operating time. It computes the present
+    values of ``_reduced_kernel`` for all projects at once, which avoids the overhead per project of ``mc_run``
+    for small ``n`` and many projects.
+
+    The parameters of the config (the wacc, the scaling factor and the yearly electricity prices) are drawn once per
+    sample and shared by all projects, i.e. the projects are compared with common random numbers. The results of
+    each project therefore have the same distribution as from ``mc_run``, but are not the same samples. The samples
+    are simulated in chunks of ``config.chunk_size``, and a chunk needs about ``n_projects * time`` floats per
+    sample. Only random sampling in float64 is supported, without blocks and without a ``target_ci_half_width``.
+
+    :param config: Simulation config.
+    :param pjs: Projects to simulate.
+    :param outputs: Names of the results to return, from ``PER_SAMPLE_OUTPUTS`` and ``COMPONENT_OUTPUTS``.
+    :return: Dictionary of simulation results of shape ``(n_projects, n)``.
+    """
+    unknown = set(outputs) - set(PER_SAMPLE_OUTPUTS + COMPONENT_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown outputs: {sorted(unknown)}.")
+    if config.sampling != "random" or config.dtype != "float64":
+        raise ValueError("mc_run_projects only supports random sampling in float64.")
+    if config.block_size is not None or config.target_ci_half_width is not None:
+        raise ValueError("mc_run_projects does not support a block_size or a target_ci_half_width.")
+    if config.antithetic:
+        config, pjs = _antithetic(config, pjs)
+
+    construction_time = np.stack([_full(_draw_time(pj.time.construction, config.n), config.n) for pj in pjs])
+    operating_time = np.stack([_full(_draw_time(pj.time.operating, config.n), config.n) for pj in pjs])
+    # The yearly draws of each project have the shape of its own run in ``mc_run``
+    operational_times = [int(np.max(times)) for times in operating_time]
+    plans = [
+        SamplingPlan(
+            {key: dist for key, dist in sampling_plan(config, pj).parameters.items() if key not in SHARED_PARAMETERS}
+        )
+        for pj in pjs
+    ]
+    shared = SamplingPlan({"wacc": config.wacc, "scaling": config.scaling})
+
+    results = {key: np.empty((len(pjs), config.n)) for key in outputs}
+    chunk_size = config.chunk_size or config.n
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}.")
+    for start in range(0, config.n, chunk_size):
+        stop = min(start + chunk_size, config.n)
+        chunk = _stacked_kernel(
+            config,
+            pjs,
+            plans,
+            shared,
+            construction_time[:, start:stop],
+            operating_time[:, start:stop],
+            operational_times,
+            outputs,
+        )
+        for key in outputs:
+            results[key][:, start:stop] = chunk[key]
+    return results
+
+
+def _stacked_kernel(
+    config: SimulationConfig,
+    pjs: list[SimulationProject],
+    plans: list[SamplingPlan],
+    shared: SamplingPlan,
+    construction_time: np.ndarray,
+    operating_time: np.ndarray,
+    operational_times: list[int],
+    outputs: tuple[str, ...],
+) -> dict:
+    """
+    Simulates a chunk of samples of all projects of ``mc_run_projects``. The times are ``(n_projects, n)`` arrays,
+    and the operating years of each project are padded from its maximum operating time in ``operational_times``.
+
+    The discount factors of the operating years and the yearly electricity prices are shared, so they are built
+    once as ``(n, time)`` arrays. The loadfactors of each project are zeroed in place after the end of operation and
+    in the padding, and the loadfactors of all projects are reduced over time against them in a single ``einsum``
+    each.
+    """
+    n = construction_time.shape[1]
+    shared_values = shared.draw(n)
+    stacked = {}
+    for i, plan in enumerate(plans):
+        for key, values in plan.draw(n).items():
+            stacked.setdefault(key, np.empty((len(plans), n)))[i] = values
+    wacc = shared_values["wacc"]
+    plant_capacity = stacked["plant_capacity"]
+
+    max_operational_time = max(operational_times)
+    shape = (n, max_operational_time)
+    electricity_price = _draw(config.electricity_price, shape)
+    years = np.arange(max_operational_time)
+    loadfactor = np.empty((len(pjs), *shape))
+    for i, (pj, pj_operational_time) in enumerate(zip(pjs, operational_times)):
+        pj.loadfactor.draw_into(loadfactor[i, :, :pj_operational_time])
+        # Assigned rather than multiplied by a mask, as the padding is uninitialized
+        loadfactor[i, :, pj_operational_time:] = 0.0
+        if np.any(operating_time[i] < pj_operational_time):
+            loadfactor[i, years >= operating_time[i, :, np.newaxis]] = 0.0
+
+    discount_rate = 1 / (1 + wacc)
+    weights = np.empty(shape)
+    weights[:, 0] = 1.0
+    weights[:, 1:] = _column(discount_rate)
+    np.cumprod(weights, axis=1, out=weights)
+
+    disc_loadfactor = np.einsum("pij,ij->pi", loadfactor, weights)
+    disc_price_loadfactor = np.einsum("pij,ij->pi", loadfactor, weights * electricity_price)
+    del loadfactor, weights
+
+    components = _present_values(
+        discount_rate,
+        construction_time,
+        operating_time,
+        plant_capacity,
+        plant_capacity * stacked["operating_cost_fixed"],
+        stacked["operating_cost_variable"] + stacked["operating_cost_fuel"],
+        disc_loadfactor,
+        disc_price_loadfactor,
+    )
+    drivers = {key: stacked[key] for key in INVESTMENT_DRIVERS if key in stacked}
+    drivers["scaling"] = shared_values["scaling"]
+    results = {
+        **components,
+        **recombine(components, drivers, config.opt_scaling, config.unit_doubling),
+        "wacc": np.broadcast_to(wacc, (len(pjs), n)),
+    }
+    return {key: results[key] for key in outputs}
+
+
+def _copy_buffered(results: dict, buffers: dict) -> dict:
+    """Copies the results that are views of the arrays in ``buffers``, e.g. the wacc, as later chunks overwrite them."""
+    arrays = [buffer for buffer in buffers.values() if isinstance(buffer, np.ndarray)]
     return {
+        key: np.copy(values) if any(np.may_share_memory(values, array) for array in arrays) else values
+        for key, values in results.items()
+    }
+
+
+def _draw_design(config: SimulationConfig, pj: SimulationProject) -> dict:
+    """
+    Samples the times and the per-sample parameters of a run from the design of ``config.sampling``, with the
+    investment drivers of all scaling options, such that the design does not depend on the requested outputs.
+    """
+    plan = SamplingPlan(
+        {
+            "construction_time": pj.time.construction,
+            "operating_time": pj.time.operating,
+            **sampling_plan(config, pj, tuple(ScalingOption)).parameters,
+        }
+    )
+    return plan.draw_design(config.n, config.sampling)
+
+
+def _draw_inputs(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    n: int,
+    max_operational_time: int,
+    scaling_options: tuple[ScalingOption, ...] | None = None,
+    buffers: dict | None = None,
+    design: dict | None = None,
+) -> dict:
+    """
+    Draws the inputs of a block. The per-sample parameters are drawn with the ``sampling_plan`` of the project in
+    float64, with the investment drivers for the given scaling options in addition to the one of the config, unless
+    they are given by the samples of a ``design``. The yearly draws have the precision of ``config.dtype``. If
+    ``buffers`` is given, the compiled plan and the arrays of all draws are kept in it, such that consecutive chunks
+    reuse them.
+    """
+    if design is not None:
+        values = design
+    elif buffers is None:
+        values = sampling_plan(config, pj, (config.opt_scaling, *(scaling_options or ()))).draw(n)
+    else:
+        plan = buffers.get("sampling_plan")
+        if plan is None:
+            plan = buffers["sampling_plan"] = sampling_plan(config, pj, (config.opt_scaling, *(scaling_options or ())))
+        parameters = buffers.get("parameters")
+        if parameters is None or parameters.shape[1] < n:
+            parameters = buffers["parameters"] = plan.allocate(n)
+        values = plan.draw(n, out=parameters[:, :n])
+    plant_capacity = values["plant_capacity"]
+    shape = (n, max_operational_time)
+    inputs = {
+        "plant_capacity": plant_capacity,
+        "wacc": values["wacc"],
+        "electricity_price": _draw_yearly(config.electricity_price, shape, config.dtype, buffers, "electricity_price"),
+        "loadfactor": _draw_yearly(pj.loadfactor, shape, config.dtype, buffers, "loadfactor"),
+        "investment_drivers": {key: values[key] for key in INVESTMENT_DRIVERS if key in values},
+    }
+    inputs["investment"] = investment_cost(
+        inputs["investment_drivers"], plant_capacity, config.opt_scaling, config.unit_doubling
+    )
+    inputs["operating_cost_fix"] = plant_capacity * values["operating_cost_fixed"]
+    inputs["operating_cost_variable"] = values["operating_cost_variable"] + values["operating_cost_fuel"]
+    return inputs
+
+
+def _draw_yearly(
+    distribution: Distribution, shape: tuple[int, int], dtype, buffers: dict | None, key: str
+) -> np.ndarray | float:
+    """Draws an ``(n, time)`` array, into the rows of a buffer kept in ``buffers`` under ``key`` if given."""
+    if buffers is None or isinstance(distribution, Degenerate):
+        return _draw(distribution, shape, dtype=dtype)
+    buffer = buffers.get(key)
+    if buffer is None or buffer.shape[0] < shape[0] or buffer.shape[1:] != shape[1:]:
+        buffer = buffers[key] = np.empty(shape, dtype=dtype)
+    return distribution.draw_into(buffer[: shape[0]])
+
+
+def _matrix_kernel(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    n: int,
+    construction_time: np.ndarray | int,
+    operating_time: np.ndarray | int,
+    max_time: int,
+    max_operational_time: int,
+    outputs: tuple[str, ...],
+    buffers: dict | None = None,
+    design: dict | None = None,
+    profiler: StageProfiler = NO_PROFILER,
+) -> dict:
+    """
+    Simulates the samples of one block by building the yearly cash flows as padded time-series matrices. The time
+    grid is given by the maximum times of the whole run, such that the per-year draws consume the random streams
+    exactly as a single-shot run would.
+    """
+    with profiler.stage("sampling"):
+        inputs = _draw_inputs(config, pj, n, max_operational_time, buffers=buffers, design=design)
+    profiler.allocated("sampling", inputs)
+    plant_capacity = inputs["plant_capacity"]
+    wacc = inputs["wacc"]
+    electricity_price = inputs["electricity_price"]
+    loadfactor = inputs["loadfactor"]
+    investment = inputs["investment"]
+    operating_cost_fix = inputs["operating_cost_fix"]
+    operating_cost_variable = inputs["operating_cost_variable"]
+    dtype = np.dtype(config.dtype)
+
+    with profiler.stage("allocation"):
+        cash_in = np.zeros((n, max_time), dtype=dtype)
+        cash_out = np.zeros((n, max_time), dtype=dtype)
+        electricity = np.zeros((n, max_time), dtype=dtype)
+    profiler.allocated("allocation", cash_in, cash_out, electricity)
+
+    if np.ndim(construction_time) == 0 and np.ndim(operating_time) == 0:
+        # Same timeline for all samples
+        construction = slice(0, construction_time)
+        operation = slice(construction_time, construction_time + operating_time)
+
+        # Construction stage
+        with profiler.stage("construction"):
+            cash_out[:, construction] = _column(investment / construction_time)
+
+        # Operational stage
+        with profiler.stage("operation"):
+            electricity[:, operation] = _column(plant_capacity, dtype) * loadfactor * 8760
+            cash_in[:, operation] = electricity_price * electricity[:, operation]
+            cash_out[:, operation] = (
+                _column(operating_cost_fix, dtype) + _column(operating_cost_variable, dtype) * electricity[:, operation]
+            )
+    else:
+        construction_time = np.broadcast_to(construction_time, (n,))
+        operating_time = np.broadcast_to(operating_time, (n,))
+        operational_shape = (n, max_operational_time)
+
+        with profiler.stage("masks"):
+            time_indices = np.arange(max_time)
+            construction_mask = time_indices < construction_time[:, None]
+            operation_end_time = construction_time + operating_time
+            operation_mask = (time_indices >= construction_time[:, None]) & (time_indices < operation_end_time[:, None])
+        profiler.allocated("masks", construction_mask, operation_mask)
+
+        # Construction stage
+        with profiler.stage("construction"):
+            cash_out[construction_mask] = np.broadcast_to(investment / construction_time, (n,)).repeat(
+                construction_time
+            )
+
+        # Operational stage
+        with profiler.stage("operation"):
+            electricity[operation_mask] = np.broadcast_to(
+                _column(plant_capacity, dtype) * loadfactor * 8760, operational_shape
+            ).flatten()
+            cash_in[operation_mask] = (
+                np.broadcast_to(electricity_price, operational_shape).flatten() * electricity[operation_mask]
+            )
+            cash_out[operation_mask] = (
+                np.broadcast_to(np.asarray(operating_cost_fix, dtype), (n,)).repeat(operating_time)
+                + np.broadcast_to(np.asarray(operating_cost_variable, dtype), (n,)).repeat(operating_time)
+                * electricity[operation_mask]
+            )
+
+    with profiler.stage("discounting"):
+        discount = 1 / ((1 + _column(wacc, dtype)) ** (np.arange(max_time, dtype=dtype)))
+        disc_electricity = electricity * discount
+        cash_net = cash_in - cash_out
+        disc_cash_out = cash_out * discount
+        disc_cash_net = cash_net * discount
+    profiler.allocated("discounting", discount, disc_electricity, cash_net, disc_cash_out, disc_cash_net)
+
+    with profiler.stage("reduction"):
+        npv = np.sum(disc_cash_net, axis=1, dtype=np.float64) / plant_capacity
+        lcoe = np.sum(disc_cash_out, axis=1, dtype=np.float64) / np.sum(disc_electricity, axis=1, dtype=np.float64)
+        means = _operating_means(outputs, loadfactor, electricity_price, n, operating_time, max_operational_time)
+    profiler.allocated("reduction", npv, lcoe, means)
+
+    results = {
         "disc_cash_out": disc_cash_out,
         "disc_cash_net": disc_cash_net,
         "disc_electricity": disc_electricity,
+        "wacc": _full(wacc, n),
+        "electricity_price": _full(electricity_price, (n, max_operational_time)),
+        "loadfactor": _full(loadfactor, (n, max_operational_time)),
+        "investment": _full(investment, n),
+        "npv": npv,
+        "lcoe": lcoe,
+        **means,
+    }
+    return {key: results[key] for key in outputs}
+
+
+def _reduced_kernel(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    n: int,
+    construction_time: np.ndarray | int,
+    operating_time: np.ndarray | int,
+    max_time: int,
+    max_operational_time: int,
+    outputs: tuple[str, ...],
+    buffers: dict | None = None,
+    design: dict | None = None,
+    profiler: StageProfiler = NO_PROFILER,
+) -> dict:
+    """
+    Simulates the samples of one block by reducing the discounted cash flows over time directly, without
+    materializing the cash-flow matrices. The draws are identical to ``_matrix_kernel``.
+
+    The construction costs are discounted with a closed-form annuity over the construction time. The operating
+    years are weighted with discount factors built as a cumulative product of ``1 / (1 + wacc)``, relative to the
+    start of operation. With a constant wacc and operating time, the discount factors are a single vector.
+
+    The results are recombined from present values that do not depend on the investment costs (see
+    ``COMPONENT_OUTPUTS`` and ``recombine``). If investment drivers are requested, they are drawn for all scaling
+    options.
+    """
+    scaling_options = tuple(ScalingOption) if set(outputs) & set(INVESTMENT_DRIVERS) else None
+    with profiler.stage("sampling"):
+        inputs = _draw_inputs(config, pj, n, max_operational_time, scaling_options, buffers, design)
+    profiler.allocated("sampling", inputs)
+    plant_capacity = inputs["plant_capacity"]
+    wacc = inputs["wacc"]
+    electricity_price = inputs["electricity_price"]
+    loadfactor = inputs["loadfactor"]
+    operating_cost_fix = inputs["operating_cost_fix"]
+    operating_cost_variable = inputs["operating_cost_variable"]
+
+    with profiler.stage("discounting"):
+        discount_rate = 1 / (1 + wacc)
+
+        # Discount factors of the operating years, zero after the end of operation
+        weights = np.empty(np.shape(discount_rate) + (max_operational_time,), dtype=config.dtype)
+        weights[..., 0] = 1.0
+        weights[..., 1:] = _column(discount_rate)
+        np.cumprod(weights, axis=-1, out=weights)
+    profiler.allocated("discounting", discount_rate, weights)
+    if np.any(operating_time < max_operational_time):
+        with profiler.stage("masks"):
+            # Zeroed in place, only a discount vector of a constant wacc is broadcast to a matrix first
+            if weights.ndim == 1:
+                weights = np.broadcast_to(weights, (n, max_operational_time)).copy()
+                profiler.allocated("masks", weights)
+            weights[np.arange(max_operational_time) >= _column(operating_time)] = 0.0
+
+    with profiler.stage("reduction"):
+        disc_loadfactor = _discounted_sum(weights, loadfactor)
+        disc_price_loadfactor = _discounted_sum(weights, loadfactor, electricity_price)
+        del weights
+
+        components = _present_values(
+            discount_rate,
+            construction_time,
+            operating_time,
+            plant_capacity,
+            operating_cost_fix,
+            operating_cost_variable,
+            disc_loadfactor,
+            disc_price_loadfactor,
+        )
+        recombined = recombine(components, inputs["investment_drivers"], config.opt_scaling, config.unit_doubling)
+        means = _operating_means(outputs, loadfactor, electricity_price, n, operating_time, max_operational_time)
+    profiler.allocated("reduction", disc_loadfactor, disc_price_loadfactor, components, recombined, means)
+
+    results = {
+        **components,
+        **inputs["investment_drivers"],
+        **recombined,
         "wacc": wacc,
         "electricity_price": electricity_price,
         "loadfactor": loadfactor,
+        **means,
+    }
+    shapes = {"electricity_price": (n, max_operational_time), "loadfactor": (n, max_operational_time)}
+    return {key: _full(results[key], shapes.get(key, n)) for key in outputs}
+
+
+def _present_values(
+    discount_rate: np.ndarray | float,
+    construction_time: np.ndarray | int,
+    operating_time: np.ndarray | int,
+    plant_capacity: np.ndarray | float,
+    operating_cost_fix: np.ndarray | float,
+    operating_cost_variable: np.ndarray | float,
+    disc_loadfactor: np.ndarray | float,
+    disc_price_loadfactor: np.ndarray | float,
+) -> dict[str, np.ndarray | float]:
+    """
+    Present values of a run that do not depend on the investment costs (``COMPONENT_OUTPUTS``), shared by
+    ``_reduced_kernel`` and ``_stacked_kernel``.
+
+    :param discount_rate: ``1 / (1 + wacc)``.
+    :param disc_loadfactor: Loadfactors summed over the operating years, discounted to the start of operation.
+    :param disc_price_loadfactor: Products of loadfactor and electricity price, discounted in the same way.
+    :return: Present values by name.
+    """
+    operation_discount = discount_rate**construction_time
+    annual_production = plant_capacity * 8760
+    pv_electricity = operation_discount * annual_production * disc_loadfactor
+    return {
+        "plant_capacity": plant_capacity,
+        "pv_capex_factor": annuity_factor(discount_rate, construction_time) / construction_time,
+        "pv_opex": (
+            operation_discount * operating_cost_fix * annuity_factor(discount_rate, operating_time)
+            + operating_cost_variable * pv_electricity
+        ),
+        "pv_revenue": operation_discount * annual_production * disc_price_loadfactor,
+        "pv_electricity": pv_electricity,
+    }
+
+
+def _operating_means(
+    outputs: tuple[str, ...],
+    loadfactor: np.ndarray | float,
+    electricity_price: np.ndarray | float,
+    n: int,
+    operating_time: np.ndarray | int,
+    max_operational_time: int,
+) -> dict[str, np.ndarray]:
+    """Means of the requested yearly draws over the operating years of each sample (see ``CONTROL_VARIATES``)."""
+    means = {}
+    for key, draws in (("mean_loadfactor", loadfactor), ("mean_electricity_price", electricity_price)):
+        if key not in outputs:
+            continue
+        if np.ndim(draws) == 0:
+            means[key] = np.full(n, float(draws))
+        elif np.ndim(operating_time) == 0:
+            means[key] = draws[:, :operating_time].mean(axis=1, dtype=np.float64)
+        else:
+            operating = np.arange(max_operational_time) < _column(operating_time)
+            means[key] = np.sum(draws, axis=1, where=operating, dtype=np.float64) / operating_time
+    return means
+
+
+def recombine(
+    components: dict, drivers: dict, opt_scaling: ScalingOption, unit_doubling: int
+) -> dict[str, np.ndarray | float]:
+    """
+    Computes the NPV, LCOE and investment costs of a scaling option and number of unit doublings from the
+    per-sample present values of a run (``COMPONENT_OUTPUTS``) and the investment drivers (``INVESTMENT_DRIVERS``).
+    Only the investment costs depend on the scaling option and the unit doubling, so variants of a run are
+    recombined in O(n) without another Monte Carlo pass.
+
+    :param components: Present values per sample.
+    :param drivers: Parameters of the investment costs.
+    :param opt_scaling: Scaling option.
+    :param unit_doubling: Number of unit doublings.
+    :return: Dictionary with "npv", "lcoe" and "investment".
+    """
+    plant_capacity = components["plant_capacity"]
+    investment = investment_cost(drivers, plant_capacity, opt_scaling, unit_doubling)
+    pv_cash_out = investment * components["pv_capex_factor"] + components["pv_opex"]
+    return {
         "investment": investment,
-        "npv": np.sum(disc_cash_net, axis=1) / plant_capacity,
-        "lcoe": np.sum(disc_cash_out, axis=1) / np.sum(disc_electricity, axis=1),
+        "npv": (components["pv_revenue"] - pv_cash_out) / plant_capacity,
+        "lcoe": pv_cash_out / components["pv_electricity"],
+    }
+
+
+def _discounted_sum(weights: np.ndarray, *factors: np.ndarray | float) -> np.ndarray | float:
+    """
+    Sums the product of the factors over time, weighted with the discount factors, in a single pass accumulating in
+    float64. The factors are scalars or ``(n, time)`` arrays, the weights a ``(time,)`` or ``(n, time)`` array.
+    """
+    scale = np.prod([factor for factor in factors if np.ndim(factor) == 0])
+    matrices = [factor for factor in factors if np.ndim(factor)]
+    if not matrices and weights.ndim == 1:
+        return scale * weights.sum(dtype=np.float64)
+    subscripts = ",".join(["ij"] * len(matrices) + ["j" if weights.ndim == 1 else "ij"]) + "->i"
+    return scale * np.einsum(subscripts, *matrices, weights, dtype=np.float64)
+
+
+def annuity_factor(discount_rate: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """
+    Sum of ``discount_rate**t`` for ``t = 0, ..., periods - 1``.
+
+    :param discount_rate: Discount factor per year, ``1 / (1 + wacc)``.
+    :param periods: Number of years.
+    :return: Present value of a unit payment in each of the years.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (1 - discount_rate**periods) / (1 - discount_rate)
+    return np.where(discount_rate == 1, periods, factor)
+
+
+def _numba_kernel(
+    config: SimulationConfig,
+    pj: SimulationProject,
+    n: int,
+    construction_time: np.ndarray | int,
+    operating_time: np.ndarray | int,
+    max_time: int,
+    max_operational_time: int,
+    outputs: tuple[str, ...],
+    buffers: dict | None = None,
+    design: dict | None = None,
+    profiler: StageProfiler = NO_PROFILER,
+) -> dict:
+    """
+    Simulates the samples of one block with the fused loop of ``fused_kernel``, compiled with numba and parallel
+    over the samples. Each sample's timeline is accumulated in a single pass without temporary arrays. The draws
+    are identical to ``_matrix_kernel``, and so are the results up to round-off. Falls back to ``_reduced_kernel``
+    if numba is not installed.
+    """
+    from smr_mcs.fused_kernel import NUMBA_AVAILABLE, fused_sums
+
+    if not NUMBA_AVAILABLE:
+        global _numba_warned
+        if not _numba_warned:
+            logger.warning("numba is not installed, using the reduced kernel instead.")
+            _numba_warned = True
+        return _reduced_kernel(
+            config,
+            pj,
+            n,
+            construction_time,
+            operating_time,
+            max_time,
+            max_operational_time,
+            outputs,
+            buffers,
+            design,
+            profiler,
+        )
+
+    with profiler.stage("sampling"):
+        inputs = _draw_inputs(config, pj, n, max_operational_time, buffers=buffers, design=design)
+    profiler.allocated("sampling", inputs)
+    shape = (n, max_operational_time)
+    npv = np.empty(n)
+    lcoe = np.empty(n)
+    # Masks, scatters, discounting and reduction are fused into a single loop
+    with profiler.stage("reduction"):
+        fused_sums(
+            np.broadcast_to(np.asarray(inputs["wacc"], dtype=np.float64), n),
+            np.broadcast_to(np.asarray(construction_time, dtype=np.int64), n),
+            np.broadcast_to(np.asarray(operating_time, dtype=np.int64), n),
+            np.broadcast_to(np.asarray(inputs["plant_capacity"], dtype=np.float64), n),
+            np.broadcast_to(np.asarray(inputs["investment"], dtype=np.float64), n),
+            np.broadcast_to(np.asarray(inputs["operating_cost_fix"], dtype=np.float64), n),
+            np.broadcast_to(np.asarray(inputs["operating_cost_variable"], dtype=np.float64), n),
+            np.broadcast_to(np.asarray(inputs["electricity_price"], dtype=config.dtype), shape),
+            np.broadcast_to(np.asarray(inputs["loadfactor"], dtype=config.dtype), shape),
+            npv,
+            lcoe,
+        )
+    profiler.allocated("reduction", npv, lcoe)
+    results = {
+        "wacc": inputs["wacc"],
+        "investment": inputs["investment"],
+        "npv": npv,
+        "lcoe": lcoe,
+        "electricity_price": inputs["electricity_price"],
+        "loadfactor": inputs["loadfactor"],
+        **_operating_means(
+            outputs, inputs["loadfactor"], inputs["electricity_price"], n, operating_time, max_operational_time
+        ),
     }
+    shapes = {"electricity_price": shape, "loadfactor": shape}
+    return {key: _full(results[key], shapes.get(key, n)) for key in outputs}
+
+
+_numba_warned = False
+
+KERNELS = {"matrix": _matrix_kernel, "reduced": _reduced_kernel, "numba": _numba_kernel}
+
+
+def memory_per_sample(
+    config: SimulationConfig, pj: SimulationProject, n_outputs: int = len(PER_SAMPLE_OUTPUTS)
+) -> tuple[float, float]:
+    """
+    Estimates the bytes ``mc_run`` allocates per sample, from the upper bounds of the project times. The factors
+    are calibrated against the peak allocations of the kernels.
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param n_outputs: Number of requested per-sample outputs.
+    :return: Bytes per sample of a chunk, and bytes per sample of the run (times and outputs).
+    """
+    operating_time = int(pj.time.operating.upper_bound())
+    total_time = int(pj.time.construction.upper_bound()) + operating_time
+    # Constant parameters are broadcast as scalars
+    yearly_draws = sum(not isinstance(dist, Degenerate) for dist in (config.electricity_price, pj.loadfactor))
+    if config.kernel == "matrix":
+        # Cash-flow, discount and discounted matrices, draws and masks
+        chunk_floats = 8.25 * total_time + yearly_draws * operating_time + 12
+    elif config.kernel == "numba":
+        # Draws only
+        chunk_floats = yearly_draws * operating_time + 10
+    else:
+        # Draws, and the weight matrix unless the wacc and operating time are constant, masked with a boolean matrix
+        varying_time = not isinstance(pj.time.operating, Degenerate)
+        weight_matrix = varying_time or not isinstance(config.wacc, Degenerate)
+        chunk_floats = (yearly_draws + weight_matrix + varying_time / 8) * operating_time + 10
+    # The yearly arrays have the precision of the config, the draws are generated in float64 first
+    itemsize = np.dtype(config.dtype).itemsize
+    chunk_bytes = itemsize * chunk_floats + (8 - itemsize) * operating_time
+    run_floats = 4 + 2 * n_outputs
+    if config.sampling != "random":
+        # Generating the design points, and the samples mapped from them that are kept for the whole run
+        run_floats += 4 * (2 + len(sampling_plan(config, pj, tuple(ScalingOption)).names))
+    return chunk_bytes, 8 * run_floats
+
+
+def estimate_memory(config: SimulationConfig, pj: SimulationProject, n_outputs: int = len(PER_SAMPLE_OUTPUTS)) -> int:
+    """
+    Estimates the peak bytes allocated by ``mc_run`` for a project (for a single block if ``config.block_size`` is
+    set).
+
+    :param config: Simulation config.
+    :param pj: Project instance.
+    :param n_outputs: Number of requested per-sample outputs.
+    :return: Estimated peak memory in bytes.
+    """
+    n_run = min(config.n, config.block_size or config.n)
+    n_chunk = min(n_run, config.chunk_size or n_run)
+    chunk_bytes, run_bytes = memory_per_sample(config, pj, n_outputs)
+    return int(chunk_bytes * n_chunk + run_bytes * n_run)
 
 
 def get_total_size(obj, seen=None):
@@ -113,6 +1117,9 @@ def get_total_size(obj, seen=None):
         return 0
     seen.add(obj_id)
 
+    if isinstance(obj, np.ndarray):
+        # Includes the data if the array owns it, views only count their header
+        return size
     if isinstance(obj, dict):
         size += sum(get_total_size(v, seen) for v in obj.values())
         size += sum(get_total_size(k, seen) for k in obj.keys())
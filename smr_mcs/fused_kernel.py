@@ -0,0 +1,101 @@
+import numpy as np
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+
+def _fused_sums(
+    wacc: np.ndarray,
+    construction_time: np.ndarray,
+    operating_time: np.ndarray,
+    plant_capacity: np.ndarray,
+    investment: np.ndarray,
+    operating_cost_fix: np.ndarray,
+    operating_cost_variable: np.ndarray,
+    electricity_price: np.ndarray,
+    loadfactor: np.ndarray,
+    npv: np.ndarray,
+    lcoe: np.ndarray,
+):
+    """
+    Walks the timeline of each sample in a single loop, accumulating the discounted cash flows and electricity
+    without building any ``(n, time)`` arrays. The yearly cash flows are those of ``_matrix_kernel``: the investment
+    is spread evenly over the construction years, followed by the revenues, O&M costs and production of the
+    operating years. Writes the NPV per MW and the LCOE into ``npv`` and ``lcoe``.
+
+    All arguments are arrays with a value per sample, the yearly ones of shape ``(n, time)``. Constant parameters
+    are passed as broadcast (zero-stride) views.
+    """
+    for i in prange(len(wacc)):
+        discount_rate = 1.0 / (1.0 + wacc[i])
+        discount = 1.0
+        cash_out = 0.0
+        cash_net = 0.0
+        electricity = 0.0
+
+        construction_cost = investment[i] / construction_time[i]
+        for _ in range(construction_time[i]):
+            cash_out += construction_cost * discount
+            cash_net -= construction_cost * discount
+            discount *= discount_rate
+
+        production = plant_capacity[i] * 8760.0
+        for t in range(operating_time[i]):
+            year_electricity = production * loadfactor[i, t]
+            year_cost = operating_cost_fix[i] + operating_cost_variable[i] * year_electricity
+            cash_out += year_cost * discount
+            cash_net += (electricity_price[i, t] * year_electricity - year_cost) * discount
+            electricity += year_electricity * discount
+            discount *= discount_rate
+
+        npv[i] = cash_net / plant_capacity[i]
+        lcoe[i] = cash_out / electricity
+
+
+if NUMBA_AVAILABLE:
+    fused_sums = njit(parallel=True, cache=True, nogil=True)(_fused_sums)
+else:
+    fused_sums = None
+
+
+if __name__ == "__main__":
+    # Checks the numba kernel against the matrix kernel on the reference dataset, with the same draws
+    import dataclasses
+    from pathlib import Path
+
+    from smr_mcs.config import SimulationConfig
+    from smr_mcs.distributions import Distribution
+    from smr_mcs.functions import mc_run
+    from smr_mcs.project import load_simulation_projects_from_yaml
+
+    if not NUMBA_AVAILABLE:
+        print("numba is not installed, the numba kernel falls back to the reduced kernel.")
+
+    def random_distributions(obj) -> list[Distribution]:
+        if isinstance(obj, Distribution):
+            return [obj] if hasattr(obj, "rng") else []
+        if dataclasses.is_dataclass(obj):
+            fields = dataclasses.fields(obj)
+            return [dist for field in fields for dist in random_distributions(getattr(obj, field.name))]
+        return []
+
+    config = SimulationConfig.from_yaml(Path.cwd() / "config/reference.yaml")
+    config = dataclasses.replace(config, n=20_000, chunk_size=None)
+    projects = load_simulation_projects_from_yaml(Path.cwd() / "data/reference.yaml")
+    for pj in projects:
+        distributions = random_distributions(config) + random_distributions(pj)
+        states = [dist.rng.bit_generator.state for dist in distributions]
+        reference = mc_run(dataclasses.replace(config, kernel="matrix"), pj)
+        for dist, state in zip(distributions, states):
+            dist.rng.bit_generator.state = state
+        fused = mc_run(dataclasses.replace(config, kernel="numba"), pj)
+        # Relative to the largest magnitude, since the NPV crosses zero
+        errors = [
+            np.max(np.abs(fused[key] - reference[key])) / np.max(np.abs(reference[key])) for key in ("npv", "lcoe")
+        ]
+        print(f"{pj.name}: npv {errors[0]:.1e}, lcoe {errors[1]:.1e}")
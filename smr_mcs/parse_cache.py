@@ -0,0 +1,65 @@
+import hashlib
+import os
+import pickle
+import uuid
+from collections.abc import Callable
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from smr_mcs.distributions import reseed_unseeded
+
+logger = getLogger(__name__)
+
+# Part of the cache keys, increment it when the classes of the parsed objects change such that old pickles are stale
+CACHE_VERSION = 1
+
+
+class ParseCache:
+    """
+    Cache of parsed datasets and configs, keyed by the content hash of the file, the parser and its arguments. A file
+    that was parsed before is returned from a pickle kept in memory, and if ``cache_dir`` is given, also in a file
+    there, such that other processes and later runs skip the parsing as well.
+
+    Every load returns a new copy. Seeded distributions start at their seed as if parsed, unseeded ones get a fresh
+    random stream (see ``reseed_unseeded``). The pickles are only as trustworthy as the cache directory, don't share
+    it with untrusted users.
+
+    :param cache_dir: Directory of the pickles, in memory only if None.
+    """
+
+    def __init__(self, cache_dir: Path | None = None) -> None:
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        self._pickles: dict[str, bytes] = {}
+
+    def key(self, file_path: Path, parse: Callable[..., Any], **kwargs) -> str:
+        digest = hashlib.sha256(Path(file_path).read_bytes())
+        digest.update(f"{CACHE_VERSION}:{parse.__module__}.{parse.__qualname__}:{sorted(kwargs.items())}".encode())
+        return digest.hexdigest()
+
+    def load(self, file_path: Path, parse: Callable[..., Any], **kwargs) -> Any:
+        """
+        Parses a file with ``parse(file_path, **kwargs)``, unless it was parsed before.
+
+        :param file_path: Path of the file.
+        :param parse: Parser of the file.
+        :return: Parsed object.
+        """
+        key = self.key(file_path, parse, **kwargs)
+        data = self._pickles.get(key)
+        cache_file = None if self.cache_dir is None else self.cache_dir / f"{key}.pickle"
+        if data is None and cache_file is not None and cache_file.exists():
+            data = cache_file.read_bytes()
+        if data is None:
+            logger.debug(f"Parsing {file_path}")
+            data = pickle.dumps(parse(file_path, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+            if cache_file is not None:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_name(f".{cache_file.name}.{uuid.uuid4().hex}.tmp")
+                tmp_file.write_bytes(data)
+                os.replace(tmp_file, cache_file)
+        self._pickles[key] = data
+
+        parsed = pickle.loads(data)
+        reseed_unseeded(parsed)
+        return parsed
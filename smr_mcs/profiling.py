@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+
+logger = getLogger(__name__)
+
+# Written next to config.json of a run directory, see ``RunProfile``
+PROFILE_FILE = "profile.json"
+
+
+class StageProfiler:
+    """
+    Records the wall time and the bytes allocated by each stage of the simulation of a project, e.g. the sampling or
+    the discounting, and the number of samples simulated. The bytes are those of the arrays a stage creates (see
+    ``get_total_size``), views and reused buffers add nothing. If ``tracemalloc`` is tracing, e.g. with
+    ``PYTHONTRACEMALLOC=1``, the peak memory of each stage above its start is recorded as well, which includes the
+    temporaries. The peaks are only meaningful with a single thread. A disabled profiler records nothing, and is the
+    default of the kernels.
+
+    The profilers of the tasks of a run, which may run in other processes, are merged with ``merge`` or collected
+    in a ``RunProfile``.
+
+    :param project: Name of the project.
+    :param enabled: Record the stages, otherwise all methods are no-ops.
+    """
+
+    def __init__(self, project: str = "", enabled: bool = True):
+        self.project = project
+        self.enabled = enabled
+        self.worker = f"{os.getpid()}/{threading.current_thread().name}"
+        self.stages: dict[str, dict] = {}
+        self.samples = 0
+        self.seconds = 0.0
+
+    def _stage(self, name: str) -> dict:
+        return self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "bytes": 0})
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times the enclosed block as a call of stage ``name``."""
+        if not self.enabled:
+            yield
+            return
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            stage = self._stage(name)
+            stage["calls"] += 1
+            stage["seconds"] += time.perf_counter() - start_time
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - start_memory
+                stage["peak_bytes"] = max(stage.get("peak_bytes", 0), peak)
+
+    def allocated(self, name: str, *objects):
+        """Adds the size of ``objects`` to the bytes allocated by stage ``name``."""
+        if self.enabled:
+            # Imported here, as functions imports this module
+            from smr_mcs.functions import get_total_size
+
+            self._stage(name)["bytes"] += sum(get_total_size(obj) for obj in objects)
+
+    @contextmanager
+    def samples_of(self, n: int):
+        """Times the enclosed block as the simulation of ``n`` samples, for the throughput."""
+        if not self.enabled:
+            yield
+            return
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds += time.perf_counter() - start_time
+            self.samples += n
+
+    @property
+    def throughput(self) -> float:
+        """Samples per second."""
+        return self.samples / self.seconds if self.seconds > 0 else float("nan")
+
+    def merge(self, other: "StageProfiler"):
+        """Adds the stages and samples recorded by another profiler."""
+        for name, other_stage in other.stages.items():
+            stage = self._stage(name)
+            for key, value in other_stage.items():
+                stage[key] = max(stage.get(key, 0), value) if key == "peak_bytes" else stage[key] + value
+        self.samples += other.samples
+        self.seconds += other.seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "seconds": self.seconds,
+            "samples_per_second": self.throughput if self.seconds > 0 else None,
+            "stages": self.stages,
+        }
+
+    def log(self):
+        logger.info(
+            f"Profile of {self.project}: {self.samples} samples in {self.seconds:.3f} s, "
+            f"{self.throughput:.4g} samples/s"
+        )
+        for name, stage in self.stages.items():
+            logger.debug(
+                f"Profile of {self.project}, {name}: {stage['calls']} calls, {stage['seconds']:.3f} s, "
+                f"{stage['bytes'] / 2**20:.1f} MiB"
+            )
+
+
+class RunProfile:
+    """
+    Collects the ``StageProfiler`` of every task of a run, and reports the stages and the throughput per project and
+    per worker (process id and thread name). Pass one to a runner to profile it, and to ``store_results`` to write it
+    as ``profile.json`` next to ``config.json``.
+    """
+
+    def __init__(self):
+        self.profilers: list[StageProfiler] = []
+
+    def add(self, profiler: StageProfiler):
+        self.profilers.append(profiler)
+        profiler.log()
+
+    def _merged(self, key: str) -> dict[str, StageProfiler]:
+        merged = {}
+        for profiler in self.profilers:
+            name = getattr(profiler, key)
+            merged.setdefault(name, StageProfiler(profiler.project if key == "project" else "")).merge(profiler)
+        return merged
+
+    def to_dict(self) -> dict:
+        workers = {
+            name: {key: value for key, value in profiler.to_dict().items() if key != "stages"}
+            for name, profiler in self._merged("worker").items()
+        }
+        return {
+            "projects": {name: profiler.to_dict() for name, profiler in self._merged("project").items()},
+            "workers": workers,
+        }
+
+    def write(self, path: Path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=4)
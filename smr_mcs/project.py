@@ -1,11 +1,56 @@
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 import yaml
 
 from smr_mcs.distributions import Degenerate, Distribution, Gaussian, Triangular, Uniform
 
+if TYPE_CHECKING:
+    from smr_mcs.parse_cache import ParseCache
+
+# The compiled parser of libyaml if available, which gives the same results several times faster
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Distributions by type name, and the columns of their parameters in a parameter table (see
+# ``load_simulation_projects_from_table``)
+DISTRIBUTIONS = {"Degenerate": Degenerate, "Uniform": Uniform, "Gaussian": Gaussian, "Triangular": Triangular}
+DISTRIBUTION_PARAMETERS = {
+    "Degenerate": ("value",),
+    "Uniform": ("lower", "upper"),
+    "Gaussian": ("mean", "std"),
+    "Triangular": ("left", "mode", "right"),
+}
+# Parameters of a project, with the nesting of ``SimulationProject`` as dotted names
+PROJECT_PARAMETERS = (
+    "investment",
+    "plant_capacity",
+    "learning_factor",
+    "time.construction",
+    "time.operating",
+    "loadfactor",
+    "operating_cost.fixed",
+    "operating_cost.variable",
+    "operating_cost.fuel",
+    "reference_pj.investment",
+    "reference_pj.capacity",
+)
+# Columns of the raw project data (``data/project_data_raw.csv``) in a parameter table
+RAW_COLUMNS = {
+    "type": "reactor_type",
+    "construction_time": "time.construction",
+    "operating_time": "time.operating",
+    "loadfactor_lower": "loadfactor.lower",
+    "loadfactor_upper": "loadfactor.upper",
+    "operating_cost_fix": "operating_cost.fixed",
+    "operating_cost_variable": "operating_cost.variable",
+    "operating_cost_fuel": "operating_cost.fuel",
+    "reference_pj_investment": "reference_pj.investment",
+    "reference_pj_capacity": "reference_pj.capacity",
+}
+
 
 @dataclass(frozen=True)
 class ProjectTime:
@@ -107,7 +152,7 @@ class SimulationProject:
 
 def get_projects(df_projects: pd.DataFrame) -> list[Project]:
     pjs = []
-    for _, row in df_projects.iterrows():
+    for row in df_projects.to_dict("records"):
         pjs.append(
             Project(
                 name=row["name"],
@@ -154,9 +199,18 @@ def create_distribution(data):
         raise ValueError(f"Unknown distribution type: {distribution_type}")
 
 
-def load_simulation_projects_from_yaml(file_path: Path):
+def load_simulation_projects_from_yaml(file_path: Path, cache: "ParseCache | None" = None):
+    """
+    Loads the projects of a dataset in YAML.
+
+    :param file_path: Path of the dataset.
+    :param cache: Cache of parsed files, which returns a copy of the projects if the file was parsed before.
+    """
+    if cache is not None:
+        return cache.load(file_path, load_simulation_projects_from_yaml)
+
     with open(file_path, "r") as yaml_file:
-        data = yaml.safe_load(yaml_file)
+        data = yaml.load(yaml_file, Loader=YAML_LOADER)
 
     simulation_projects = []
     for project_data in data:
@@ -185,3 +239,106 @@ def load_simulation_projects_from_yaml(file_path: Path):
         simulation_projects.append(simulation_project)
 
     return simulation_projects
+
+
+def create_distributions(columns: dict[str, np.ndarray], parameter: str, n: int) -> list[Distribution]:
+    """
+    Creates the distributions of a parameter for all rows of a parameter table at once, by type instead of row by row.
+
+    The type of the distribution is given by the column ``<parameter>.type``, and is Degenerate if there is none. The
+    parameters of the distributions are in the columns ``<parameter>.<name>`` (see ``DISTRIBUTION_PARAMETERS``),
+    the value of Degenerate distributions also in the column ``<parameter>``, and the optional seeds in
+    ``<parameter>.seed``.
+
+    :param columns: Columns of the parameter table by name.
+    :param parameter: Dotted name of the parameter, e.g. "time.construction".
+    :param n: Number of rows.
+    :return: Distributions in the order of the rows.
+    """
+    types = columns.get(f"{parameter}.type", np.full(n, "Degenerate", dtype=object))
+    seeds = columns.get(f"{parameter}.seed", np.full(n, None, dtype=object))
+
+    distributions = [None] * n
+    for distribution_type in pd.unique(types):
+        if distribution_type not in DISTRIBUTIONS:
+            raise ValueError(f"Unknown distribution type: {distribution_type}")
+        rows = (types == distribution_type).nonzero()[0]
+        names = [f"{parameter}.{name}" for name in DISTRIBUTION_PARAMETERS[distribution_type]]
+        if distribution_type == "Degenerate" and names[0] not in columns:
+            names = [parameter]
+        missing = [name for name in names if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns for {distribution_type} distributions: {missing}")
+        # As Python scalars, such that the distributions print as when loaded from YAML
+        arguments = [columns[name][rows].tolist() for name in names]
+        if distribution_type == "Degenerate":
+            created = [Degenerate(value) for value in arguments[0]]
+        else:
+            created = [
+                DISTRIBUTIONS[distribution_type](*values, seed=None if pd.isna(seed) else int(seed))
+                for *values, seed in zip(*arguments, seeds[rows].tolist())
+            ]
+        for row, distribution in zip(rows, created):
+            distributions[row] = distribution
+    return distributions
+
+
+def load_simulation_projects_from_table(table: pd.DataFrame) -> list[SimulationProject]:
+    """
+    Creates projects from a columnar parameter table with a row per project, with the columns "name" and
+    "reactor_type", and the columns of each parameter in ``PROJECT_PARAMETERS`` (see ``create_distributions``). The
+    columns are those of ``pd.json_normalize`` of a dataset in YAML, e.g. "time.construction.type". Columns with
+    missing values are read as floats, so their integer values become floats.
+
+    :param table: Parameter table.
+    :return: List of projects.
+    """
+    columns = {name: table[name].to_numpy() for name in table.columns}
+    n = len(table)
+    distributions = {parameter: create_distributions(columns, parameter, n) for parameter in PROJECT_PARAMETERS}
+    return [
+        SimulationProject(
+            name=name,
+            reactor_type=reactor_type,
+            investment=distributions["investment"][i],
+            plant_capacity=distributions["plant_capacity"][i],
+            learning_factor=distributions["learning_factor"][i],
+            time=SimulationProjectTime(
+                construction=distributions["time.construction"][i],
+                operating=distributions["time.operating"][i],
+            ),
+            loadfactor=distributions["loadfactor"][i],
+            operating_cost=SimulationOperatingCost(
+                fixed=distributions["operating_cost.fixed"][i],
+                variable=distributions["operating_cost.variable"][i],
+                fuel=distributions["operating_cost.fuel"][i],
+            ),
+            reference_pj=SimulationReferenceReactor(
+                investment=distributions["reference_pj.investment"][i],
+                capacity=distributions["reference_pj.capacity"][i],
+            ),
+        )
+        for i, (name, reactor_type) in enumerate(zip(table["name"].tolist(), table["reactor_type"].tolist()))
+    ]
+
+
+def load_simulation_projects_from_csv(file_path: Path, sep: str = ";", cache: "ParseCache | None" = None):
+    """
+    Loads the projects of a parameter table in CSV (see ``load_simulation_projects_from_table``), or of the raw
+    project data in the layout of ``data/project_data_raw.csv``. The raw columns are renamed with ``RAW_COLUMNS``,
+    and the loadfactor is uniform between its lower and upper bound, as in ``data/reference.yaml``. Surrounding
+    whitespace is stripped from the names and reactor types.
+
+    :param file_path: Path of the CSV file.
+    :param sep: Column separator.
+    :param cache: Cache of parsed files, which returns a copy of the projects if the file was parsed before.
+    """
+    if cache is not None:
+        return cache.load(file_path, load_simulation_projects_from_csv, sep=sep)
+
+    table = pd.read_csv(file_path, sep=sep).rename(columns=RAW_COLUMNS)
+    for column in ("name", "reactor_type"):
+        table[column] = table[column].str.strip()
+    if "loadfactor.lower" in table and "loadfactor.type" not in table:
+        table["loadfactor.type"] = "Uniform"
+    return load_simulation_projects_from_table(table)
@@ -0,0 +1,92 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RESULT_FORMATS = ("npy", "parquet", "csv")
+MANIFEST = "manifest.json"
+
+
+def parquet_available() -> bool:
+    """Whether pandas can read and write Parquet files (requires pyarrow)."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def write_results(results: pd.DataFrame, path: Path, result_format: str = "npy") -> Path:
+    """
+    Writes simulation results with one column per project.
+
+    - "npy": a directory with one ``.npy`` file per project and a ``manifest.json`` listing the projects. Columns can
+      be memory-mapped and read individually.
+    - "parquet": a single Parquet file, read column by column. Requires pyarrow.
+    - "csv": the plain text format of earlier runs.
+
+    :param results: Results with one column per project.
+    :param path: Path of the results without suffix, e.g. ``<config_path>/lcoe_results``.
+    :param result_format: One of ``RESULT_FORMATS``.
+    :return: Path of the written directory or file.
+    """
+    if result_format == "npy":
+        path.mkdir(exist_ok=True, parents=True)
+        columns = []
+        for i, name in enumerate(results.columns):
+            values = results[name].to_numpy()
+            file_name = f"{i:03d}.npy"
+            np.save(path / file_name, values)
+            columns.append({"name": name, "file": file_name, "dtype": values.dtype.str, "length": len(values)})
+        with open(path / MANIFEST, "w") as file:
+            json.dump({"format": "npy", "columns": columns}, file, indent=4)
+        return path
+    elif result_format == "parquet":
+        if not parquet_available():
+            raise ValueError("Writing Parquet files requires pyarrow, use the 'npy' format instead.")
+        file_path = path.with_suffix(".parquet")
+        results.to_parquet(file_path, index=False)
+        return file_path
+    elif result_format == "csv":
+        file_path = path.with_suffix(".csv")
+        results.to_csv(file_path, index=False)
+        return file_path
+    else:
+        raise ValueError(f"Unknown result format: {result_format}. Choose from {RESULT_FORMATS}.")
+
+
+def read_results(path: Path, columns: list[str] | None = None, mmap: bool = True) -> pd.DataFrame:
+    """
+    Reads simulation results written by ``write_results``, in whichever format they were stored.
+
+    :param path: Path of the results without suffix, e.g. ``<config_path>/lcoe_results``.
+    :param columns: Projects to read, all if None.
+    :param mmap: Memory-map the ``.npy`` columns instead of reading them into memory.
+    :return: Results with one column per project.
+    """
+    if (path / MANIFEST).exists():
+        with open(path / MANIFEST, "r") as file:
+            manifest = json.load(file)
+        entries = {entry["name"]: entry for entry in manifest["columns"]}
+        missing = set(columns or []) - set(entries)
+        if missing:
+            raise KeyError(f"Projects not in {path}: {sorted(missing)}")
+        mmap_mode = "r" if mmap else None
+        data = {name: np.load(path / entries[name]["file"], mmap_mode=mmap_mode) for name in (columns or entries)}
+        return pd.DataFrame(data, copy=False)
+    elif path.with_suffix(".parquet").exists():
+        return pd.read_parquet(path.with_suffix(".parquet"), columns=columns)
+    elif path.with_suffix(".csv").exists():
+        return pd.read_csv(path.with_suffix(".csv"), usecols=columns)
+    raise FileNotFoundError(f"No results found at {path}")
+
+
+def load_results(config_path: Path, result: str, columns: list[str] | None = None, mmap: bool = True) -> pd.DataFrame:
+    """
+    Reads the results of a run stored by ``store_results``.
+
+    :param config_path: Directory of the run.
+    :param result: "npv", "lcoe" or "investment".
+    :param columns: Projects to read, all if None.
+    :param mmap: Memory-map the ``.npy`` columns instead of reading them into memory.
+    :return: Results with one column per project.
+    """
+    return read_results(config_path / f"{result}_results", columns=columns, mmap=mmap)
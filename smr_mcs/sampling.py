@@ -0,0 +1,93 @@
+import warnings
+
+import numpy as np
+
+from smr_mcs.distributions import Degenerate, Distribution
+
+SAMPLING_MODES = ("random", "lhs", "sobol")
+
+
+def uniform_design(sampling: str, n_samples: int, dimensions: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Points in the unit hypercube from a randomized space-filling design.
+
+    :param sampling: "lhs" for a Latin hypercube, "sobol" for a scrambled Sobol sequence.
+    :param n_samples: Number of points.
+    :param dimensions: Number of dimensions.
+    :param rng: Random generator for the randomization of the design.
+    :return: Array of shape ``(n_samples, dimensions)``.
+    """
+    from scipy.stats import qmc
+
+    if sampling == "lhs":
+        engine_type = qmc.LatinHypercube
+    elif sampling == "sobol":
+        engine_type = qmc.Sobol
+    else:
+        raise ValueError(f"Unknown sampling: {sampling}. Choose from {SAMPLING_MODES}.")
+    try:
+        engine = engine_type(dimensions, rng=rng)
+    except TypeError:
+        # scipy < 1.15
+        engine = engine_type(dimensions, seed=rng)
+    with warnings.catch_warnings():
+        # Sobol points warn unless n is a power of two, a prefix of the sequence is still a valid sample
+        warnings.filterwarnings("ignore", message=".*balance properties.*")
+        return engine.random(n_samples)
+
+
+class SamplingPlan:
+    """
+    Draws of a fixed set of per-sample parameters, compiled once and then filled into a single ``(parameters, n)``
+    array in one pass. Each row is filled in place with ``Distribution.draw_into``, so the random streams are
+    consumed exactly as by separate ``draw`` calls. Constant (Degenerate) parameters get no row and are returned as
+    scalars.
+
+    :param distributions: Distributions by parameter name.
+    """
+
+    def __init__(self, distributions: dict[str, Distribution]) -> None:
+        self.parameters = dict(distributions)
+        self.order = tuple(distributions)
+        self.constants = {name: dist.value for name, dist in distributions.items() if isinstance(dist, Degenerate)}
+        self.names = tuple(name for name in self.order if name not in self.constants)
+        self.distributions = tuple(distributions[name] for name in self.names)
+
+    def allocate(self, n_samples: int) -> np.ndarray:
+        """Array for the draws of ``n_samples`` samples, with a row per drawn parameter."""
+        return np.empty((len(self.names), n_samples))
+
+    def draw(self, n_samples: int, out: np.ndarray | None = None) -> dict[str, np.ndarray | float]:
+        """
+        Draws all parameters.
+
+        :param n_samples: Number of samples.
+        :param out: Array from ``allocate`` to fill, e.g. reused across chunks. A new one is allocated if None.
+        :return: Rows of the array, and the constants, by parameter name.
+        """
+        out = self.allocate(n_samples) if out is None else out
+        if out.shape != (len(self.names), n_samples):
+            raise ValueError(f"Expected an array of shape {(len(self.names), n_samples)}, got {out.shape}.")
+        for row, dist in zip(out, self.distributions):
+            dist.draw_into(row)
+        values = {**dict(zip(self.names, out)), **self.constants}
+        return {name: values[name] for name in self.order}
+
+    def draw_design(self, n_samples: int, sampling: str) -> dict[str, np.ndarray | float]:
+        """
+        Samples all parameters jointly from a space-filling design of the unit hypercube (see ``uniform_design``),
+        mapped through the inverse distribution functions. The design is randomized with a seed drawn from the
+        random stream of each distribution, so it is reproducible for seeded distributions and independent between
+        spawned streams.
+
+        :param n_samples: Number of samples.
+        :param sampling: "lhs" or "sobol".
+        :return: Samples, and the constants, by parameter name.
+        """
+        values = dict(self.constants)
+        if self.names:
+            rng = np.random.default_rng([int(dist.rng.integers(2**63)) for dist in self.distributions])
+            design = uniform_design(sampling, n_samples, len(self.names), rng)
+            for i, (name, dist) in enumerate(zip(self.names, self.distributions)):
+                values[name] = dist.ppf(design[:, i])
+        return {name: values[name] for name in self.order}
@@ -1,68 +1,773 @@
+import copy
+import dataclasses
 import hashlib
 import json
 import multiprocessing as mp
+import os
+import shutil
+import uuid
+import weakref
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
-from smr_mcs.config import SimulationConfig
-from smr_mcs.functions import mc_run
+from smr_mcs.catalog import CATALOG_FILE, RunCatalog
+from smr_mcs.checkpoint import RunCheckpoint, task_name
+from smr_mcs.config import ScalingOption, SimulationConfig
+from smr_mcs.distributions import rng_states, set_rng_states
+from smr_mcs.functions import (
+    COMPONENT_OUTPUTS,
+    INVESTMENT_DRIVERS,
+    control_outputs,
+    control_values,
+    estimate_memory,
+    mc_run,
+    mc_run_block,
+    mc_run_chunks,
+    mc_run_projects,
+    mean_estimator,
+    memory_per_sample,
+    recombine,
+    sample_blocks,
+    spawn_block,
+)
+from smr_mcs.profiling import PROFILE_FILE, RunProfile, StageProfiler
 from smr_mcs.project import SimulationProject
+from smr_mcs.result_store import load_results, read_results, write_results
+from smr_mcs.statistics import MeanEstimator, SummaryStatistics, describe_summaries
 
 logger = getLogger(__name__)
 
+RUNNER_OUTPUTS = ("npv", "lcoe", "investment")
+# Execution backends of ``run_simulation_concurrent``
+BACKENDS = ("processes", "threads")
+
+# Written last to a run directory, marks the results as complete
+COMPLETE_MARKER = "COMPLETE"
+# Directory of the stored components of a dataset, see ``store_components``
+COMPONENTS_DIR = "components"
+# Runs that draw their samples in a different order than ``run_simulation``, stored under their own config hash:
+# ``run_simulation_stacked`` and the results recombined from components (see ``run_sweep``)
+RUN_VARIANTS = ("stacked", "components")
+
+# Smallest chunk the scheduler picks, below this the per-chunk overhead dominates
+MIN_CHUNK_SIZE = 1000
+# Memory of a worker process before it allocates any simulation arrays
+WORKER_OVERHEAD = 64 * 2**20
+
+
+def plan_resources(
+    pjs: list[SimulationProject],
+    config: SimulationConfig,
+    num_processes: int,
+    memory_budget: int,
+    keep_samples: bool = True,
+) -> tuple[int, SimulationConfig]:
+    """
+    Picks the number of processes and the chunk size such that the estimated peak memory of a run stays within the
+    budget. The estimate covers the shared result blocks, and per process the largest project footprint (see
+    ``estimate_memory``).
+
+    :param pjs: Projects to simulate.
+    :param config: Simulation config.
+    :param num_processes: Maximum number of processes.
+    :param memory_budget: Memory budget in bytes.
+    :param keep_samples: Whether the results are kept, otherwise only a chunk of them at a time (see
+        ``run_simulation_summary``).
+    :return: Number of processes, and the config with the chunk size to use.
+    """
+    n_run = min(config.n, config.block_size or config.n)
+    n_tasks = len(pjs) * len(sample_blocks(config))
+    min_chunk = min(MIN_CHUNK_SIZE, n_run)
+    if keep_samples:
+        available = memory_budget - 8 * config.n * len(pjs) * len(RUNNER_OUTPUTS)
+        footprints = [memory_per_sample(config, pj, len(RUNNER_OUTPUTS)) for pj in pjs]
+    else:
+        # The results of a chunk are reduced right away, only the times are drawn for the whole run
+        available = memory_budget
+        footprints = []
+        for pj in pjs:
+            chunk_bytes, run_bytes = memory_per_sample(config, pj, len(RUNNER_OUTPUTS))
+            footprints.append((chunk_bytes + run_bytes, run_bytes - 16 * len(RUNNER_OUTPUTS)))
+
+    for processes in range(max(min(num_processes, n_tasks), 1), 0, -1):
+        per_process = available / processes - WORKER_OVERHEAD
+        chunk_size = min(int((per_process - run_bytes * n_run) // chunk_bytes) for chunk_bytes, run_bytes in footprints)
+        if chunk_size >= min_chunk:
+            break
+    else:
+        pj = max(pjs, key=lambda pj: estimate_memory(dataclasses.replace(config, chunk_size=min_chunk), pj))
+        required = (
+            memory_budget
+            - available
+            + WORKER_OVERHEAD
+            + estimate_memory(dataclasses.replace(config, chunk_size=min_chunk), pj, len(RUNNER_OUTPUTS))
+        )
+        raise ValueError(
+            f"Memory budget of {memory_budget / 2**30:.2f} GiB is too small: a single task ({pj.name}) with chunks of "
+            f"{min_chunk} samples is estimated to need {required / 2**30:.2f} GiB, including "
+            f"{(memory_budget - available) / 2**30:.2f} GiB for the results."
+        )
+
+    if chunk_size < min(n_run, config.chunk_size or n_run):
+        config = dataclasses.replace(config, chunk_size=chunk_size)
+    logger.info(
+        f"Memory budget of {memory_budget / 2**30:.2f} GiB: {processes} processes with chunks of "
+        f"{config.chunk_size or n_run} samples."
+    )
+    return processes, config
+
 
 def simulate_project(pj, config):
     logger.info(f"Running simulation for project: {pj.name}")
-    results = mc_run(config=config, pj=pj)
+    results = mc_run(config=config, pj=pj, outputs=RUNNER_OUTPUTS)
     logger.info(f"Done with simulation for project: {pj.name}")
     return pj.name, results["npv"], results["lcoe"], results["investment"]
 
 
+def _shared_array(shm: SharedMemory, shape: tuple[int, int]) -> np.ndarray:
+    """Column-major float array backed by a shared memory block."""
+    return np.ndarray(shape, dtype=np.float64, buffer=shm.buf, order="F")
+
+
+def _simulate_project_shared(
+    pj: SimulationProject,
+    config: SimulationConfig,
+    column: int,
+    block: int | None,
+    shm_names: list[str],
+    shape: tuple[int, int],
+    profile: bool = False,
+    checkpoint: RunCheckpoint | None = None,
+) -> tuple[StageProfiler, list[MeanEstimator] | None]:
+    """
+    Simulates a project, or one of its sample blocks, and writes the results into a column of the shared result
+    blocks.
+    """
+    shms = [SharedMemory(name=name) for name in shm_names]
+    try:
+        arrays = [_shared_array(shm, shape) for shm in shms]
+        profiler, estimators = _simulate_project_into(pj, config, column, block, arrays, profile, checkpoint)
+        del arrays
+    finally:
+        for shm in shms:
+            shm.close()
+    return profiler, estimators
+
+
+def _simulate_project_into(
+    pj: SimulationProject,
+    config: SimulationConfig,
+    column: int,
+    block: int | None,
+    arrays: list[np.ndarray],
+    profile: bool = False,
+    checkpoint: RunCheckpoint | None = None,
+) -> tuple[StageProfiler, list[MeanEstimator] | None]:
+    """
+    Simulates a project, or one of its sample blocks, and writes the results into a column of the ``(n, n_projects)``
+    result arrays. Returns the profiler of the task, which records nothing unless ``profile`` is set, and the
+    estimators of the means of the results if the config has antithetic pairs or control variates (see
+    ``_simulate_estimated``).
+
+    If a checkpoint is given, the results of a task it holds are loaded instead of simulated, and the results of a
+    simulated task are saved to it.
+    """
+    profiler = StageProfiler(pj.name, enabled=profile)
+    task = task_name(column, block)
+    if checkpoint is not None and checkpoint.is_done(task):
+        logger.info(f"Loading project from checkpoint: {pj.name}" + ("" if block is None else f", block {block}"))
+        results, _, estimator_states = checkpoint.load(task)
+        estimators = None if estimator_states is None else [MeanEstimator.from_dict(s) for s in estimator_states]
+    else:
+        if block is None:
+            logger.info(f"Running simulation for project: {pj.name}")
+        else:
+            logger.info(f"Running simulation for project: {pj.name}, block {block}")
+        results, estimators = _simulate_estimated(config, pj, block, profiler)
+        if checkpoint is not None:
+            checkpoint.save(task, results, estimators=_estimator_states(estimators))
+
+    if block is None:
+        # Runs with a target_ci_half_width may stop early, the remaining rows are NaN
+        rows = slice(0, len(results["lcoe"]))
+    else:
+        rows = slice(*sample_blocks(config)[block])
+
+    for key, array in zip(RUNNER_OUTPUTS, arrays):
+        array[rows, column] = results[key]
+        if block is None:
+            array[rows.stop :, column] = np.nan
+    logger.info(f"Done with simulation for project: {pj.name}")
+    return profiler, estimators
+
+
 def run_simulation_concurrent(
-    pjs: list[SimulationProject], config: SimulationConfig, num_processes: int
+    pjs: list[SimulationProject],
+    config: SimulationConfig,
+    num_processes: int,
+    memory_budget: int | None = None,
+    backend: str = "processes",
+    profile: RunProfile | None = None,
+    checkpoint: RunCheckpoint | None = None,
+    estimators: dict[str, list[MeanEstimator]] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Simulates the projects in a process pool. The workers write their results directly into shared memory blocks
+    laid out as ``(n, n_projects)``, which are returned as DataFrames without copying.
+
+    Without ``config.block_size`` each project is a task. Otherwise every sample block of every project is a task,
+    such that a single project can use all processes. The results then do not depend on the number of processes.
+
+    With the "threads" backend, the tasks run in a thread pool of the same size instead and write into plain arrays,
+    without starting processes or pickling. This pays off since the kernels spend most of their time in NumPy
+    operations that release the GIL. Each task draws from its own copy of the distributions, as a process worker
+    does. With ``config.block_size`` both backends give the same results.
+
+    If a memory budget in bytes is given, the number of processes and the chunk size are reduced to fit it (see
+    ``plan_resources``). If a ``RunProfile`` is given, the stages of every task are profiled into it.
+
+    If a checkpoint is given (see ``open_checkpoint``), every task saves its results to it as soon as it finishes,
+    and the tasks it already holds are loaded instead of simulated. With ``config.block_size``, a resumed run gives
+    the same results as an uninterrupted one.
+
+    If a dict of estimators is given, it is filled as by ``run_simulation``.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}. Choose from {BACKENDS}.")
+    if memory_budget is not None:
+        num_processes, config = plan_resources(pjs, config, num_processes, memory_budget)
+    logger.info(f"Running {num_processes} {backend}.")
+
+    shape = (config.n, len(pjs))
+    columns = [pj.name for pj in pjs]
+    tasks = [(pj, config, column, None) for column, pj in enumerate(pjs)]
+    if config.block_size is not None:
+        n_blocks = len(sample_blocks(config))
+        tasks = [(pj, config, column, block) for pj, config, column, _ in tasks for block in range(n_blocks)]
+
+    if backend == "threads":
+        arrays = [np.empty(shape, order="F") for _ in RUNNER_OUTPUTS]
+        with ThreadPoolExecutor(max_workers=num_processes) as executor:
+            futures = [
+                executor.submit(
+                    _simulate_project_into,
+                    *copy.deepcopy((pj, config)),
+                    column,
+                    block,
+                    arrays,
+                    profile is not None,
+                    checkpoint,
+                )
+                for pj, config, column, block in tasks
+            ]
+            task_results = [future.result() for future in futures]
+        _add_profilers(profile, [profiler for profiler, _ in task_results])
+        _merge_estimators(estimators, config, pjs, [task[0] for task in tasks], task_results)
+        npv_results, lcoe_results, investment_results = (
+            pd.DataFrame(array, columns=columns, copy=False) for array in arrays
+        )
+        return npv_results, lcoe_results, investment_results
+
+    blocks = [SharedMemory(create=True, size=8 * config.n * len(pjs)) for _ in RUNNER_OUTPUTS]
+    shm_names = [shm.name for shm in blocks]
+
+    try:
+        with mp.Pool(processes=num_processes) as pool:
+            task_results = pool.starmap(
+                _simulate_project_shared,
+                [(*task, shm_names, shape, profile is not None, checkpoint) for task in tasks],
+            )
+    except BaseException:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+        raise
+    _add_profilers(profile, [profiler for profiler, _ in task_results])
+    _merge_estimators(estimators, config, pjs, [task[0] for task in tasks], task_results)
+
+    frames = []
+    for shm in blocks:
+        # The mapping stays valid after unlinking and is closed once the array is garbage collected
+        shm.unlink()
+        array = _shared_array(shm, shape)
+        weakref.finalize(array, shm.close)
+        frames.append(pd.DataFrame(array, columns=columns, copy=False))
+
+    npv_results, lcoe_results, investment_results = frames
+    return npv_results, lcoe_results, investment_results
+
+
+def _add_profilers(profile: RunProfile | None, profilers: list[StageProfiler]):
+    if profile is not None:
+        for profiler in profilers:
+            profile.add(profiler)
+
+
+def _estimates_means(config: SimulationConfig) -> bool:
+    """Whether the means of the results of a config are estimated with ``mean_estimator`` instead of plain means."""
+    return config.antithetic or config.control_variates
+
+
+def _update_estimators(estimators: list[MeanEstimator], config: SimulationConfig, chunk: dict):
+    controls = control_values(config, chunk)
+    for key, estimator in zip(RUNNER_OUTPUTS, estimators):
+        estimator.update(chunk[key], controls)
+
+
+def _estimator_states(estimators: list[MeanEstimator] | None) -> list[dict] | None:
+    return None if estimators is None else [estimator.to_dict() for estimator in estimators]
+
+
+def _simulate_estimated(
+    config: SimulationConfig, pj: SimulationProject, block: int | None, profiler: StageProfiler
+) -> tuple[dict, list[MeanEstimator] | None]:
+    """
+    Simulates the ``RUNNER_OUTPUTS`` of a project, or of one of its sample blocks, as ``mc_run``. If the config has
+    antithetic pairs or control variates, the estimators of the means of the outputs are updated chunk by chunk, as
+    by ``run_simulation_summary``, and returned as well, otherwise None.
+    """
+    if block is not None:
+        config, pj = spawn_block(config, pj, block)
+    if not _estimates_means(config):
+        return mc_run(config=config, pj=pj, outputs=RUNNER_OUTPUTS, profiler=profiler), None
+
+    estimators = [mean_estimator(config, pj) for _ in RUNNER_OUTPUTS]
+    outputs = (*RUNNER_OUTPUTS, *(key for key in control_outputs(config) if key not in RUNNER_OUTPUTS))
+    chunks = []
+    for chunk in mc_run_chunks(config=config, pj=pj, outputs=outputs, profiler=profiler):
+        _update_estimators(estimators, config, chunk)
+        chunks.append(chunk)
+    results = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in RUNNER_OUTPUTS}
+    return results, estimators
+
+
+def _merge_estimators(
+    estimators: dict[str, list[MeanEstimator]] | None,
+    config: SimulationConfig,
+    pjs: list[SimulationProject],
+    task_projects: list[SimulationProject],
+    task_results: list[tuple[StageProfiler, list[MeanEstimator] | None]],
+):
+    """Merges the estimators of the tasks of a run into ``estimators`` by project name, if given."""
+    if estimators is None or not _estimates_means(config):
+        return
+    for pj in pjs:
+        estimators[pj.name] = [mean_estimator(config, pj) for _ in RUNNER_OUTPUTS]
+    for pj, (_, task_estimators) in zip(task_projects, task_results):
+        for total, estimator in zip(estimators[pj.name], task_estimators):
+            total.merge(estimator)
+
+
+def add_estimates(summary: pd.DataFrame, estimators: dict[str, MeanEstimator]):
+    """
+    Replaces the means of a summary in the layout of ``DataFrame.describe`` by those of the estimators of its
+    columns, and adds the rows "std_error", the standard error of the means, and "variance_reduction", the factor by
+    which independent samples without control variates would have a larger variance of the mean.
+    """
+    estimates = [estimators[name].estimate() for name in summary.columns]
+    summary.loc["mean"] = [mean for mean, _ in estimates]
+    summary.loc["std_error"] = [std_error for _, std_error in estimates]
+    summary.loc["variance_reduction"] = [estimators[name].variance_reduction() for name in summary.columns]
+
+
+def run_simulation(
+    pjs: list[SimulationProject],
+    config: SimulationConfig,
+    profile: RunProfile | None = None,
+    checkpoint: RunCheckpoint | None = None,
+    estimators: dict[str, list[MeanEstimator]] | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
-    logger.info(f"Running {num_processes} processes.")
+    """
+    Simulates the projects one after another.
+
+    If a checkpoint is given (see ``open_checkpoint``), the results of each project are saved to it as soon as the
+    project finishes, with the states of the random streams of the config. The projects it already holds are loaded
+    instead of simulated, and the streams of the config continue from the last of them, so a resumed run gives the
+    same results as an uninterrupted one.
 
-    with mp.Pool(processes=num_processes) as pool:
-        results = pool.starmap(simulate_project, [(pj, config) for pj in pjs])
+    :param pjs: Projects to simulate.
+    :param config: Simulation config.
+    :param profile: Profile of the run, into which the stages of every project are profiled.
+    :param checkpoint: Checkpoint of the run.
+    :param estimators: If the config has antithetic pairs or control variates, filled with the estimators of the
+        means of the NPV, LCOE and investment (see ``mean_estimator``) by project name, to pass to ``store_results``.
+    :return: NPV, LCOE and investment results with one column per project.
+    """
+    npv_results = {}
+    lcoe_results = {}
+    investment_results = {}
 
-    npv_results = pd.DataFrame()
-    lcoe_results = pd.DataFrame()
-    investment_results = pd.DataFrame()
+    for i, pj in enumerate(pjs):
+        task = task_name(i)
+        if checkpoint is not None and checkpoint.is_done(task):
+            logger.info(f"Loading project {i} from checkpoint: {pj.name}")
+            results, states, estimator_states = checkpoint.load(task)
+            if states is not None:
+                set_rng_states(config, states)
+            pj_estimators = None
+            if estimator_states is not None:
+                pj_estimators = [MeanEstimator.from_dict(state) for state in estimator_states]
+        else:
+            logger.info(f"Running simulation for project {i}: {pj.name}")
+
+            profiler = StageProfiler(pj.name, enabled=profile is not None)
+            results, pj_estimators = _simulate_estimated(config, pj, None, profiler)
+            _add_profilers(profile, [profiler])
+            if checkpoint is not None:
+                checkpoint.save(task, results, rng_states(config), _estimator_states(pj_estimators))
+        if estimators is not None and pj_estimators is not None:
+            estimators[pj.name] = pj_estimators
+
+        npv_results[pj.name] = pd.Series(results["npv"])
+        lcoe_results[pj.name] = pd.Series(results["lcoe"])
+        investment_results[pj.name] = pd.Series(results["investment"])
 
-    for result in results:
-        pj_name, npv, lcoe, investment = result
-        npv_results[pj_name] = npv
-        lcoe_results[pj_name] = lcoe
-        investment_results[pj_name] = investment
+    # Projects of runs with a target_ci_half_width may have fewer samples, which are padded with NaN
+    return pd.DataFrame(npv_results), pd.DataFrame(lcoe_results), pd.DataFrame(investment_results)
 
+
+def run_simulation_stacked(
+    pjs: list[SimulationProject], config: SimulationConfig
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Simulates all projects in one vectorized pass with ``mc_run_projects``, which is faster than ``run_simulation``
+    for small ``n``. The projects share the draws of the config parameters (see ``mc_run_projects``).
+    """
+    logger.info(f"Running stacked simulation for {len(pjs)} projects")
+    results = mc_run_projects(config, pjs, outputs=RUNNER_OUTPUTS)
+    columns = [pj.name for pj in pjs]
+    npv_results, lcoe_results, investment_results = (
+        pd.DataFrame(results[key].T, columns=columns) for key in RUNNER_OUTPUTS
+    )
     return npv_results, lcoe_results, investment_results
 
 
-def run_simulation(pjs: list[SimulationProject], config: SimulationConfig) -> tuple[pd.DataFrame, pd.DataFrame]:
-    npv_results = pd.DataFrame()
-    lcoe_results = pd.DataFrame()
-    investment_results = pd.DataFrame()
+def _summarize_project(
+    pj: SimulationProject, config: SimulationConfig, block: int | None, profile: bool = False
+) -> tuple[str, list[SummaryStatistics], list[MeanEstimator], StageProfiler]:
+    """
+    Simulates a project, or one of its sample blocks, and returns the summary statistics and the estimators of the
+    means of the results, and the profiler of the task, which records nothing unless ``profile`` is set.
+    """
+    if block is None:
+        logger.info(f"Running simulation for project: {pj.name}")
+    else:
+        logger.info(f"Running simulation for project: {pj.name}, block {block}")
+        config, pj = spawn_block(config, pj, block)
+
+    summaries = [SummaryStatistics() for _ in RUNNER_OUTPUTS]
+    estimators = [mean_estimator(config, pj) for _ in RUNNER_OUTPUTS]
+    outputs = (*RUNNER_OUTPUTS, *(key for key in control_outputs(config) if key not in RUNNER_OUTPUTS))
+    profiler = StageProfiler(pj.name, enabled=profile)
+    for chunk in mc_run_chunks(config=config, pj=pj, outputs=outputs, profiler=profiler):
+        _update_estimators(estimators, config, chunk)
+        for key, summary in zip(RUNNER_OUTPUTS, summaries):
+            summary.update(chunk[key])
+    logger.info(f"Done with simulation for project: {pj.name}")
+    return pj.name, summaries, estimators, profiler
+
+
+def run_simulation_summary(
+    pjs: list[SimulationProject],
+    config: SimulationConfig,
+    num_processes: int = 1,
+    memory_budget: int | None = None,
+    profile: RunProfile | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Simulates the projects without keeping the samples. The results are reduced chunk by chunk to streaming summary
+    statistics (see ``SummaryStatistics``), so the memory does not grow with ``config.n`` beyond the sampled times.
+    With several processes, every project (or sample block, if ``config.block_size`` is set) is a task and the
+    statistics of the tasks are merged.
+
+    The mean, standard deviation, minimum and maximum agree with ``DataFrame.describe`` of the samples up to
+    round-off. The percentiles are within a relative error of 5e-4 of the samples at their rank, and differ from
+    ``DataFrame.describe`` by at most that plus the gap between the samples it interpolates (see ``QuantileSketch``),
+    e.g. by less than 5e-4 on the seeded reference dataset with ``n = 1e5``.
+
+    With ``config.antithetic`` or ``config.control_variates``, the means are those of the ``mean_estimator`` instead,
+    and the summaries get the rows "std_error" and "variance_reduction" (see ``add_estimates``).
+
+    :param pjs: Projects to simulate.
+    :param config: Simulation config.
+    :param num_processes: Number of processes, the projects are simulated in this process if 1.
+    :param memory_budget: Memory budget in bytes, see ``plan_resources``.
+    :param profile: Profile of the run, into which the stages of every task are profiled.
+    :return: NPV, LCOE and investment summaries in the layout of ``DataFrame.describe``.
+    """
+    if memory_budget is not None:
+        num_processes, config = plan_resources(pjs, config, num_processes, memory_budget, keep_samples=False)
+
+    blocks = [None] if config.block_size is None else range(len(sample_blocks(config)))
+    tasks = [(pj, config, block, profile is not None) for pj in pjs for block in blocks]
+    if num_processes > 1:
+        logger.info(f"Running {num_processes} processes.")
+        with mp.Pool(processes=num_processes) as pool:
+            results = pool.starmap(_summarize_project, tasks)
+    else:
+        results = [_summarize_project(*task) for task in tasks]
+
+    merged = {pj.name: [SummaryStatistics() for _ in RUNNER_OUTPUTS] for pj in pjs}
+    merged_estimators = {pj.name: [mean_estimator(config, pj) for _ in RUNNER_OUTPUTS] for pj in pjs}
+    _add_profilers(profile, [result[-1] for result in results])
+    for name, summaries, estimators, _ in results:
+        for total, summary in zip(merged[name], summaries):
+            total.merge(summary)
+        for total, estimator in zip(merged_estimators[name], estimators):
+            total.merge(estimator)
+
+    frames = []
+    for i in range(len(RUNNER_OUTPUTS)):
+        frame = describe_summaries({name: summaries[i] for name, summaries in merged.items()})
+        if _estimates_means(config):
+            add_estimates(frame, {name: estimators[i] for name, estimators in merged_estimators.items()})
+        frames.append(frame)
+    npv_summary, lcoe_summary, investment_summary = frames
+    return npv_summary, lcoe_summary, investment_summary
+
+
+def _simulate_components(pj: SimulationProject, config: SimulationConfig, block: int | None) -> dict:
+    """Simulates the present values and investment drivers of a project, or of one of its sample blocks."""
+    logger.info(f"Running simulation for project: {pj.name}" + ("" if block is None else f", block {block}"))
+    outputs = COMPONENT_OUTPUTS + INVESTMENT_DRIVERS
+    if block is None:
+        return mc_run(config=config, pj=pj, outputs=outputs)
+    return mc_run_block(config=config, pj=pj, block=block, outputs=outputs)
+
 
+def simulate_components(
+    pjs: list[SimulationProject], config: SimulationConfig, num_processes: int = 1
+) -> tuple[dict[str, dict], dict[str, dict]]:
+    """
+    Simulates the per-sample present values (``COMPONENT_OUTPUTS``) and investment drivers (``INVESTMENT_DRIVERS``)
+    of the projects, from which the results of any scaling option and unit doubling are recombined (see
+    ``recombine_projects``).
+
+    :param pjs: Projects to simulate.
+    :param config: Simulation config, its scaling option and unit doubling do not affect the components.
+    :param num_processes: Number of processes, the projects are simulated in this process if 1.
+    :return: Components and investment drivers, by project name.
+    """
+    if config.target_ci_half_width is not None:
+        raise ValueError("The components are simulated for a fixed n, the config cannot have a target_ci_half_width.")
+    blocks = [None] if config.block_size is None else range(len(sample_blocks(config)))
+    tasks = [(pj, config, block) for pj in pjs for block in blocks]
+    if num_processes > 1:
+        logger.info(f"Running {num_processes} processes.")
+        with mp.Pool(processes=num_processes) as pool:
+            results = pool.starmap(_simulate_components, tasks)
+    else:
+        results = [_simulate_components(*task) for task in tasks]
+
+    components, drivers = {}, {}
     for i, pj in enumerate(pjs):
-        logger.info(f"Running simulation for project {i}: {pj.name}")
+        pj_results = results[i * len(blocks) : (i + 1) * len(blocks)]
+        if len(pj_results) == 1:
+            values = pj_results[0]
+        else:
+            values = {key: np.concatenate([block[key] for block in pj_results]) for key in pj_results[0]}
+        components[pj.name] = {key: values[key] for key in COMPONENT_OUTPUTS}
+        drivers[pj.name] = {key: values[key] for key in INVESTMENT_DRIVERS}
+    return components, drivers
 
-        results = mc_run(config=config, pj=pj)
 
-        npv_results[pj.name] = results["npv"]
-        lcoe_results[pj.name] = results["lcoe"]
-        investment_results[pj.name] = results["investment"]
+def recombine_projects(
+    components: dict[str, dict], drivers: dict[str, dict], opt_scaling: ScalingOption, unit_doubling: int
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Recombines the results of a scaling option and unit doubling from the components of a run (see ``recombine``).
 
+    :param components: Present values per sample, by project name.
+    :param drivers: Investment drivers per sample, by project name.
+    :param opt_scaling: Scaling option.
+    :param unit_doubling: Number of unit doublings.
+    :return: NPV, LCOE and investment results.
+    """
+    points = {name: recombine(components[name], drivers[name], opt_scaling, unit_doubling) for name in components}
+    npv_results, lcoe_results, investment_results = (
+        pd.DataFrame({name: point[key] for name, point in points.items()}) for key in RUNNER_OUTPUTS
+    )
     return npv_results, lcoe_results, investment_results
 
 
+def run_sweep(
+    pjs: list[SimulationProject],
+    base_config: SimulationConfig,
+    scaling_options: list[ScalingOption] | None = None,
+    unit_doublings: list[int] | None = None,
+    num_processes: int = 1,
+    output_path: Path | None = None,
+    force: bool = False,
+) -> Iterator[tuple[SimulationConfig, pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """
+    Simulates every combination of scaling option and unit doubling from a single Monte Carlo pass per project.
+
+    Only the investment costs depend on the scaling option and the unit doubling. The projects are simulated once,
+    keeping the per-sample present values and investment drivers (see ``simulate_components``), and each sweep point
+    is recombined from them (see ``recombine``). All points thus use common random numbers, so differences between
+    points are paired and free of sampling noise from the shared inputs. For seeded distributions, each point equals
+    a separate run of the reduced kernel.
+
+    If an output path is given, the components are stored there (see ``store_components``), and components stored
+    by an earlier run are reused unless forced, such that the sweep does not simulate at all.
+
+    The projects are simulated when the iteration starts. The components of all projects are kept until it ends,
+    about ten floats per sample and project, while the results of a point are only computed when it is reached.
+
+    :param pjs: Projects to simulate.
+    :param base_config: Simulation config, its scaling option and unit doubling are replaced per point.
+    :param scaling_options: Scaling options to sweep, all by default.
+    :param unit_doublings: Unit doublings to sweep, the one of the config by default.
+    :param num_processes: Number of processes, the projects are simulated in this process if 1.
+    :param output_path: Results directory to store and reuse the components in.
+    :param force: Simulate even if components are stored.
+    :return: Iterator over the config, and the NPV, LCOE and investment results of each point.
+    """
+    scaling_options = list(ScalingOption if scaling_options is None else map(ScalingOption, scaling_options))
+    unit_doublings = [base_config.unit_doubling] if unit_doublings is None else unit_doublings
+
+    stored = None if output_path is None or force else load_components(output_path, pjs, base_config)
+    if stored is not None:
+        logger.info(f"Recombining from stored components in {get_components_path(output_path, pjs, base_config)}")
+        components, drivers = stored
+    else:
+        components, drivers = simulate_components(pjs, base_config, num_processes)
+        if output_path is not None:
+            store_components(components, drivers, base_config, output_path, pjs)
+
+    for opt_scaling in scaling_options:
+        for unit_doubling in unit_doublings:
+            config = dataclasses.replace(base_config, opt_scaling=opt_scaling, unit_doubling=unit_doubling)
+            logger.info(f"Recombining sweep point: {opt_scaling.value}, unit doubling {unit_doubling}")
+            yield config, *recombine_projects(components, drivers, opt_scaling, unit_doubling)
+
+
 def stable_hash(s: str) -> str:
     """Generate a stable hash for a given string using SHA-256."""
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+def dataset_hash(simulation_projects: list[SimulationProject]) -> str:
+    """Hash identifying the dataset of a run."""
+    return stable_hash("\n".join(map(str, simulation_projects)))
+
+
+def _run_config(config: SimulationConfig, variant: str | None = None) -> dict:
+    """The config of a run as stored in ``config.json``, with the variant of the run (see ``RUN_VARIANTS``) if any."""
+    conf = config.to_dict()
+    if variant is not None:
+        if variant not in RUN_VARIANTS:
+            raise ValueError(f"Unknown run variant: {variant}. Choose from {RUN_VARIANTS}.")
+        conf["variant"] = variant
+    return conf
+
+
+def config_hash(config: SimulationConfig, variant: str | None = None) -> str:
+    """
+    Hash identifying the config of a run, regardless of the scaling option and of settings not affecting results.
+    Runs of a variant (see ``RUN_VARIANTS``) draw other samples for the same config and get another hash.
+    """
+    conf = _run_config(config, variant)
+    _ = conf.pop("opt_scaling")  # Generate same hash across scaling option
+    _ = conf.pop("chunk_size", None)  # Chunking does not change the results
+    _ = conf.pop("kernel", None)  # Kernels only differ by round-off
+    return stable_hash(str(conf))
+
+
+def components_hash(config: SimulationConfig) -> str:
+    """
+    Hash identifying the components of a run, which also do not depend on the unit doubling (see ``recombine``), nor
+    on the estimation of the means with control variates.
+    """
+    conf = config.to_dict()
+    for key in ("opt_scaling", "unit_doubling", "chunk_size", "kernel", "control_variates"):
+        _ = conf.pop(key, None)
+    return stable_hash(str(conf))
+
+
+def get_components_path(
+    output_path: Path, simulation_projects: list[SimulationProject], config: SimulationConfig
+) -> Path:
+    """Directory of the components of a run: ``<output_path>/<dataset hash>/components/<components hash>``."""
+    return output_path / dataset_hash(simulation_projects) / COMPONENTS_DIR / components_hash(config)
+
+
+def get_result_path(
+    output_path: Path,
+    simulation_projects: list[SimulationProject],
+    config: SimulationConfig,
+    variant: str | None = None,
+) -> Path:
+    """Directory of the results of a run: ``<output_path>/<dataset hash>/<scaling option>/<config hash>``."""
+    return output_path / dataset_hash(simulation_projects) / config.opt_scaling.value / config_hash(config, variant)
+
+
+def get_checkpoint_path(
+    output_path: Path, simulation_projects: list[SimulationProject], config: SimulationConfig
+) -> Path:
+    """Directory of the checkpoint of a run in progress, a hidden sibling of the directory of its results."""
+    config_path = get_result_path(output_path, simulation_projects, config)
+    return config_path.with_name(f".{config_path.name}.checkpoint")
+
+
+def open_checkpoint(
+    output_path: Path, simulation_projects: list[SimulationProject], config: SimulationConfig
+) -> RunCheckpoint:
+    """
+    Opens the checkpoint of a run (see ``RunCheckpoint``), which holds the tasks finished by an earlier, interrupted
+    run with the same dataset and config. Remove it once the results are stored.
+    """
+    manifest = {
+        "dataset_hash": dataset_hash(simulation_projects),
+        "scaling": config.opt_scaling.value,
+        "config_hash": config_hash(config),
+        "projects": [pj.name for pj in simulation_projects],
+        "n": config.n,
+        "block_size": config.block_size,
+    }
+    return RunCheckpoint(get_checkpoint_path(output_path, simulation_projects, config), manifest)
+
+
+def is_complete(config_path: Path) -> bool:
+    """Whether a run directory was completely written by ``store_results``."""
+    return (config_path / COMPLETE_MARKER).exists()
+
+
+def load_cached_results(
+    output_path: Path,
+    simulation_projects: list[SimulationProject],
+    config: SimulationConfig,
+    variant: str | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None:
+    """
+    Loads the results of an identical, completely stored run.
+
+    :param variant: Variant of the run (see ``RUN_VARIANTS``), None for a run of ``run_simulation``.
+    :return: NPV, LCOE and investment results, or None if there is no complete run with samples for the dataset,
+        config and variant.
+    """
+    config_path = get_result_path(output_path, simulation_projects, config, variant)
+    if not is_complete(config_path):
+        return None
+    try:
+        return tuple(load_results(config_path, result) for result in RUNNER_OUTPUTS)
+    except FileNotFoundError:
+        # Run stored without samples
+        return None
+
+
+def _atomic_write_text(path: Path, text: str):
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(text)
+    os.replace(tmp_path, path)
+
+
 def store_results(
     npv_results: pd.DataFrame,
     lcoe_results: pd.DataFrame,
@@ -70,32 +775,163 @@ def store_results(
     config: SimulationConfig,
     output_path: Path,
     simulation_projects: list[SimulationProject],
-):
-    # Summary statistics
-    npv_summary = npv_results.describe()
-    lcoe_summary = lcoe_results.describe()
-    investment_summary = investment_results.describe()
+    result_format: str = "npy",
+    profile: RunProfile | None = None,
+    estimators: dict[str, list[MeanEstimator]] | None = None,
+    variant: str | None = None,
+) -> Path:
+    """
+    Stores the results of a run under ``<output_path>/<dataset hash>/<scaling option>/<config hash>``. The samples
+    are written in ``result_format`` (see ``write_results``), the summary statistics as CSV, and the profile of the
+    run, if given, as ``profile.json``. If the estimators of the means filled by ``run_simulation`` or
+    ``run_simulation_concurrent`` are given, the summaries report their means, standard errors and variance reduction
+    factors (see ``add_estimates``). Results of ``run_simulation_stacked`` or recombined from components are stored
+    with their ``variant`` (see ``RUN_VARIANTS``), which is part of the config hash and of ``config.json``.
 
-    dataset_str = "\n".join(map(str, simulation_projects))
-    conf = config.to_dict()
-    _ = conf.pop("opt_scaling")  # Generate same hash across scaling option
-    config_str = str(conf)
+    The run is written to a temporary directory that is renamed into place once complete, so an interrupted write
+    never leaves a run that ``load_cached_results`` would pick up. Complete runs are registered in the catalog of the
+    output path (see ``RunCatalog``).
+
+    :return: Directory of the run.
+    """
+    results = {"npv": npv_results, "lcoe": lcoe_results, "investment": investment_results}
+    summaries = {key: df.describe() for key, df in results.items()}
+    if estimators:
+        for i, key in enumerate(RUNNER_OUTPUTS):
+            add_estimates(summaries[key], {name: pj_estimators[i] for name, pj_estimators in estimators.items()})
+    return _store_run(summaries, config, output_path, simulation_projects, results, result_format, profile, variant)
+
+
+def store_summaries(
+    npv_summary: pd.DataFrame,
+    lcoe_summary: pd.DataFrame,
+    investment_summary: pd.DataFrame,
+    config: SimulationConfig,
+    output_path: Path,
+    simulation_projects: list[SimulationProject],
+    profile: RunProfile | None = None,
+) -> Path:
+    """
+    Stores the summary statistics of a run without samples (see ``run_simulation_summary``), in the same layout as
+    ``store_results``. ``load_cached_results`` does not pick up such runs, a later run with samples replaces them.
+
+    :return: Directory of the run.
+    """
+    summaries = {"npv": npv_summary, "lcoe": lcoe_summary, "investment": investment_summary}
+    return _store_run(summaries, config, output_path, simulation_projects, profile=profile)
+
+
+def _store_run(
+    summaries: dict[str, pd.DataFrame],
+    config: SimulationConfig,
+    output_path: Path,
+    simulation_projects: list[SimulationProject],
+    results: dict[str, pd.DataFrame] | None = None,
+    result_format: str | None = None,
+    profile: RunProfile | None = None,
+    variant: str | None = None,
+) -> Path:
+    dataset_path = output_path / dataset_hash(simulation_projects)
+    config_path = get_result_path(output_path, simulation_projects, config, variant)
+    run_config = _run_config(config, variant)
+
+    def write(tmp_path: Path):
+        with open(tmp_path / "config.json", "w") as file:
+            json.dump(run_config, file, indent=4)
+        if profile is not None:
+            profile.write(tmp_path / PROFILE_FILE)
+
+        for key, summary in summaries.items():
+            if results is not None:
+                write_results(results[key], tmp_path / f"{key}_results", result_format)
+            summary.to_csv(tmp_path / f"{key}_summary.csv", index=key != "investment")
+
+    _write_run_directory(config_path, simulation_projects, write)
+
+    RunCatalog(output_path / CATALOG_FILE).register(
+        config_path,
+        dataset_hash=dataset_path.name,
+        config_hash=config_path.name,
+        config=run_config,
+        summaries=summaries,
+        result_format=result_format,
+    )
+
+    return config_path
+
+
+def _write_run_directory(path: Path, simulation_projects: list[SimulationProject], write: Callable[[Path], None]):
+    """
+    Writes a run directory below the dataset directory. The contents are written by ``write`` to a temporary
+    directory, which is marked complete and renamed into place, replacing an earlier directory.
+    """
+    path.parent.mkdir(exist_ok=True, parents=True)
+    dataset_path = path.parent.parent
+    _atomic_write_text(dataset_path / "dataset.txt", "\n".join(map(str, simulation_projects)))
+
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.mkdir()
+    try:
+        write(tmp_path)
+        (tmp_path / COMPLETE_MARKER).touch()
+
+        if path.exists():
+            # Replace an earlier run, which is moved out of the way first as rename requires an empty target
+            old_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.old")
+            os.replace(path, old_path)
+            os.replace(tmp_path, path)
+            shutil.rmtree(old_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def store_components(
+    components: dict[str, dict],
+    drivers: dict[str, dict],
+    config: SimulationConfig,
+    output_path: Path,
+    simulation_projects: list[SimulationProject],
+) -> Path:
+    """
+    Stores the components of a run (see ``simulate_components``) under
+    ``<output_path>/<dataset hash>/components/<components hash>``, with one column per project in the memory-mapped
+    ``npy`` format. Variants of the run are recombined from them with ``recombine_projects``.
+
+    :return: Directory of the components.
+    """
+    components_path = get_components_path(output_path, simulation_projects, config)
 
-    dataset_path = output_path / stable_hash(dataset_str)
-    config_path = dataset_path / config.opt_scaling.value / stable_hash(config_str)
+    def write(tmp_path: Path):
+        with open(tmp_path / "config.json", "w") as file:
+            json.dump(config.to_dict(), file, indent=4)
+        for key in COMPONENT_OUTPUTS:
+            values = pd.DataFrame({name: np.broadcast_to(pj[key], config.n) for name, pj in components.items()})
+            write_results(values, tmp_path / key, "npy")
+        for key in INVESTMENT_DRIVERS:
+            values = pd.DataFrame({name: np.broadcast_to(pj[key], config.n) for name, pj in drivers.items()})
+            write_results(values, tmp_path / key, "npy")
 
-    dataset_path.mkdir(exist_ok=True, parents=True)
-    config_path.mkdir(exist_ok=True, parents=True)
+    _write_run_directory(components_path, simulation_projects, write)
+    return components_path
 
-    with open(dataset_path / "dataset.txt", "w") as file:
-        file.write(dataset_str)
 
-    with open(config_path / "config.json", "w") as file:
-        json.dump(config.to_dict(), file, indent=4)
+def load_components(
+    output_path: Path, simulation_projects: list[SimulationProject], config: SimulationConfig
+) -> tuple[dict[str, dict], dict[str, dict]] | None:
+    """
+    Loads the components stored by ``store_components``, memory-mapped.
 
-    npv_results.to_csv(config_path / "npv_results.csv", index=False)
-    npv_summary.to_csv(config_path / "npv_summary.csv", index=True)
-    lcoe_results.to_csv(config_path / "lcoe_results.csv", index=False)
-    lcoe_summary.to_csv(config_path / "lcoe_summary.csv", index=True)
-    investment_results.to_csv(config_path / "investment_results.csv", index=False)
-    investment_summary.to_csv(config_path / "investment_summary.csv", index=False)
+    :return: Components and investment drivers by project name, or None if none are stored for the dataset and
+        config.
+    """
+    components_path = get_components_path(output_path, simulation_projects, config)
+    if not is_complete(components_path):
+        return None
+    names = [pj.name for pj in simulation_projects]
+    stored = {key: read_results(components_path / key) for key in COMPONENT_OUTPUTS + INVESTMENT_DRIVERS}
+    components = {name: {key: stored[key][name].to_numpy() for key in COMPONENT_OUTPUTS} for name in names}
+    drivers = {name: {key: stored[key][name].to_numpy() for key in INVESTMENT_DRIVERS} for name in names}
+    return components, drivers
@@ -0,0 +1,327 @@
+import numpy as np
+import pandas as pd
+
+SUMMARY_PERCENTILES = (0.25, 0.5, 0.75)
+
+
+def _normal_quantile(confidence_level: float) -> float:
+    """Multiple of the standard error of a two-sided normal confidence interval."""
+    from scipy.special import ndtri
+
+    return float(ndtri(0.5 + confidence_level / 2))
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with a bounded relative error, in the manner of DDSketch. Values are counted in
+    logarithmically spaced buckets ``(gamma**(k - 1), gamma**k]`` of their magnitude, separately for positive and
+    negative values. Every quantile is then within ``relative_accuracy`` of the sample at rank
+    ``floor(q * (count - 1))``. ``np.quantile`` and ``DataFrame.describe`` interpolate linearly to the next sample, so
+    the estimates differ from them by at most ``relative_accuracy`` plus the relative gap between the two samples,
+    which shrinks with the number of samples.
+
+    The memory grows with the logarithm of the range of the values, not with the number of samples, e.g. about
+    14000 buckets for values between 1 and 1e6 at the default accuracy.
+
+    :param relative_accuracy: Relative accuracy of the quantiles.
+    """
+
+    # Magnitudes below this are counted as zero
+    MIN_VALUE = 1e-12
+
+    def __init__(self, relative_accuracy: float = 5e-4) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, got {relative_accuracy}.")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.zero_count = 0
+        # Bucket counts of the positive and negative values, the first bucket of each has index offset
+        self.positive = np.zeros(0, dtype=np.int64)
+        self.positive_offset = 0
+        self.negative = np.zeros(0, dtype=np.int64)
+        self.negative_offset = 0
+
+    @property
+    def count(self) -> int:
+        return int(self.zero_count + self.positive.sum() + self.negative.sum())
+
+    def update(self, values: np.ndarray):
+        """Adds values, NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        magnitudes = np.abs(values)
+        nonzero = magnitudes >= self.MIN_VALUE
+        self.zero_count += int(np.count_nonzero(~nonzero))
+        keys = np.ceil(np.log(magnitudes[nonzero]) / np.log(self.gamma)).astype(np.int64)
+        negative = values[nonzero] < 0
+        self.positive, self.positive_offset = self._add_keys(self.positive, self.positive_offset, keys[~negative])
+        self.negative, self.negative_offset = self._add_keys(self.negative, self.negative_offset, keys[negative])
+
+    def merge(self, other: "QuantileSketch"):
+        """Adds the values counted by another sketch of the same accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        self.zero_count += other.zero_count
+        self.positive, self.positive_offset = self._add_counts(
+            self.positive, self.positive_offset, other.positive, other.positive_offset
+        )
+        self.negative, self.negative_offset = self._add_counts(
+            self.negative, self.negative_offset, other.negative, other.negative_offset
+        )
+
+    def quantile(self, q: float | np.ndarray) -> float | np.ndarray:
+        """
+        Estimates quantiles, for ranks ``q * (count - 1)`` as in ``np.quantile``.
+
+        :param q: Quantile or array of quantiles between 0 and 1.
+        """
+        count = self.count
+        if count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        negative_keys = self.negative_offset + np.arange(len(self.negative))
+        positive_keys = self.positive_offset + np.arange(len(self.positive))
+        # Buckets in ascending order of their values
+        values = np.concatenate([-self._bucket_value(negative_keys[::-1]), [0.0], self._bucket_value(positive_keys)])
+        counts = np.concatenate([self.negative[::-1], [self.zero_count], self.positive])
+        ranks = np.asarray(q, dtype=np.float64) * (count - 1)
+        estimate = values[np.searchsorted(np.cumsum(counts), ranks, side="right")]
+        return estimate if np.ndim(q) else float(estimate)
+
+    def _bucket_value(self, keys: np.ndarray) -> np.ndarray:
+        # Value with the same relative distance to both bucket boundaries
+        return 2 * self.gamma**keys / (self.gamma + 1)
+
+    @classmethod
+    def _add_keys(cls, counts: np.ndarray, offset: int, keys: np.ndarray) -> tuple[np.ndarray, int]:
+        if len(keys) == 0:
+            return counts, offset
+        key_min = int(keys.min())
+        return cls._add_counts(counts, offset, np.bincount(keys - key_min), key_min)
+
+    @staticmethod
+    def _add_counts(counts: np.ndarray, offset: int, other: np.ndarray, other_offset: int) -> tuple[np.ndarray, int]:
+        if len(other) == 0:
+            return counts, offset
+        if len(counts) == 0:
+            return other.astype(np.int64), other_offset
+        start = min(offset, other_offset)
+        stop = max(offset + len(counts), other_offset + len(other))
+        merged = np.zeros(stop - start, dtype=np.int64)
+        merged[offset - start : offset - start + len(counts)] += counts
+        merged[other_offset - start : other_offset - start + len(other)] += other
+        return merged, start
+
+
+class Moments:
+    """
+    Count, mean, variance, minimum and maximum of samples that are added chunk by chunk, without keeping them.
+    Moments accumulated separately, e.g. per worker, are combined with ``merge``. The mean and variance are merged
+    with the pairwise update of Chan et al., which is as accurate as a two-pass computation over all samples.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared deviations from the mean
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        """
+        Adds samples, NaNs are ignored as in ``DataFrame.describe``.
+
+        :return: The added samples, as a flat float64 array without NaNs.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values):
+            mean = values.mean()
+            self._merge_moments(len(values), mean, np.sum((values - mean) ** 2), values.min(), values.max())
+        return values
+
+    def merge(self, other: "Moments"):
+        """Adds the samples summarized by another instance."""
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _merge_moments(self, count: int, mean: float, m2: float, minimum: float, maximum: float):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, float(minimum))
+        self.max = max(self.max, float(maximum))
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (``ddof=1``), as in ``DataFrame.describe``."""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+
+    def ci_half_width(self, confidence_level: float = 0.95) -> float:
+        """Half-width of the normal-approximation confidence interval of the mean."""
+        if self.count < 2:
+            return np.inf
+        return _normal_quantile(confidence_level) * self.std / np.sqrt(self.count)
+
+
+class MeanEstimator:
+    """
+    Estimator of the mean of samples that are added chunk by chunk, with variance reduction by control variates
+    and antithetic pairs, and its standard error.
+
+    Control variates are per-sample quantities with a known expectation that are correlated with the samples, e.g.
+    the drawn wacc. The mean is adjusted by ``beta @ (mean(controls) - expectations)``, with ``beta`` from the
+    regression of the samples on the controls. With antithetic pairs, consecutive samples are averaged into one
+    observation first, since they are not independent. The regression is accumulated as the mean and co-moments of
+    the observations and merged like ``Moments``.
+
+    :param expectations: Expected values of the control variates, none for the plain mean.
+    :param paired: Whether consecutive samples are antithetic pairs. Chunks with an odd number of samples end with a
+        sample without its pair, which is taken as an observation of its own.
+    """
+
+    def __init__(self, expectations: tuple[float, ...] = (), paired: bool = False) -> None:
+        self.expectations = np.asarray(expectations, dtype=np.float64)
+        self.paired = paired
+        # Moments of the single samples, for the variance of the plain mean
+        self.samples = Moments()
+        # Number, mean and co-moments of the observations, controls first and the samples last
+        self.count = 0
+        self.mean = np.zeros(len(self.expectations) + 1)
+        self.comoment = np.zeros((len(self.mean), len(self.mean)))
+
+    def update(self, values: np.ndarray, controls: np.ndarray | None = None):
+        """
+        Adds samples, samples with a NaN in them or their controls are ignored.
+
+        :param values: Samples of shape ``(n,)``.
+        :param controls: Control variates of shape ``(n, len(expectations))``.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        controls = np.empty((len(values), 0)) if controls is None else np.asarray(controls, dtype=np.float64)
+        observations = np.column_stack([controls, values])
+        if self.paired and len(observations) > 1:
+            even = len(observations) // 2 * 2
+            pairs = (observations[0:even:2] + observations[1:even:2]) / 2
+            observations = np.concatenate([pairs, observations[even:]])
+        self.samples.update(values[~np.isnan(controls).any(axis=1)])
+        observations = observations[~np.isnan(observations).any(axis=1)]
+        if len(observations):
+            mean = observations.mean(axis=0)
+            deviations = observations - mean
+            self._merge_moments(len(observations), mean, deviations.T @ deviations)
+
+    def merge(self, other: "MeanEstimator"):
+        """Adds the samples of another estimator with the same control variates."""
+        self.samples.merge(other.samples)
+        if other.count:
+            self._merge_moments(other.count, other.mean, other.comoment)
+
+    def _merge_moments(self, count: int, mean: np.ndarray, comoment: np.ndarray):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean = self.mean + delta * count / total
+        self.comoment = self.comoment + comoment + np.outer(delta, delta) * self.count * count / total
+        self.count = total
+
+    def estimate(self) -> tuple[float, float]:
+        """
+        :return: The estimated mean and its standard error.
+        """
+        n_controls = len(self.expectations)
+        if n_controls == 0 or self.count <= n_controls + 1:
+            variance = self.comoment[-1, -1] / (self.count - 1) if self.count > 1 else np.nan
+            return float(self.mean[-1]), float(np.sqrt(variance / self.count)) if self.count else np.nan
+        covariance = self.comoment[:n_controls, :n_controls]
+        cross = self.comoment[:n_controls, -1]
+        # Constant controls, e.g. from constant distributions, make the covariance singular
+        beta, _, rank, _ = np.linalg.lstsq(covariance, cross, rcond=None)
+        mean = self.mean[-1] - beta @ (self.mean[:n_controls] - self.expectations)
+        residual = max(self.comoment[-1, -1] - beta @ cross, 0.0) / (self.count - 1 - rank)
+        return float(mean), float(np.sqrt(residual / self.count))
+
+    def to_dict(self) -> dict:
+        """State of the estimator as plain Python values, e.g. to save it as JSON."""
+        return {
+            "expectations": self.expectations.tolist(),
+            "paired": self.paired,
+            "samples": vars(self.samples),
+            "count": self.count,
+            "mean": self.mean.tolist(),
+            "comoment": self.comoment.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MeanEstimator":
+        estimator = cls(tuple(data["expectations"]), data["paired"])
+        vars(estimator.samples).update(data["samples"])
+        estimator.count = data["count"]
+        estimator.mean = np.asarray(data["mean"], dtype=np.float64)
+        estimator.comoment = np.asarray(data["comoment"], dtype=np.float64).reshape(estimator.comoment.shape)
+        return estimator
+
+    def ci_half_width(self, confidence_level: float = 0.95) -> float:
+        """Half-width of the normal-approximation confidence interval of the estimated mean."""
+        if self.count < 2:
+            return np.inf
+        return _normal_quantile(confidence_level) * self.estimate()[1]
+
+    def variance_reduction(self) -> float:
+        """
+        Variance of the plain mean of independent samples, estimated from the spread of the samples, over the
+        variance of the estimate, i.e. the factor by which the number of samples can be reduced for the same standard
+        error.
+        """
+        standard_error = self.estimate()[1]
+        return self.samples.std**2 / self.samples.count / standard_error**2 if standard_error > 0 else np.nan
+
+
+class SummaryStatistics(Moments):
+    """
+    Summary statistics that are updated with the samples chunk by chunk, without keeping them: the ``Moments``, and
+    quantiles from a ``QuantileSketch``. Statistics accumulated separately are combined with ``merge``.
+
+    :param relative_accuracy: Relative accuracy of the quantiles.
+    """
+
+    def __init__(self, relative_accuracy: float = 5e-4) -> None:
+        super().__init__()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, values: np.ndarray) -> np.ndarray:
+        values = super().update(values)
+        self.sketch.update(values)
+        return values
+
+    def merge(self, other: "SummaryStatistics"):
+        super().merge(other)
+        self.sketch.merge(other.sketch)
+
+    def quantile(self, q: float | np.ndarray) -> float | np.ndarray:
+        """Estimated quantiles, clipped to the minimum and maximum."""
+        return np.clip(self.sketch.quantile(q), self.min, self.max)
+
+    def describe(self, percentiles: tuple[float, ...] = SUMMARY_PERCENTILES) -> pd.Series:
+        """Summary in the layout of ``Series.describe``."""
+        if self.count == 0:
+            quantiles = [np.nan] * len(percentiles)
+            extremes = (np.nan, np.nan)
+        else:
+            quantiles = list(self.quantile(np.asarray(percentiles)))
+            extremes = (self.min, self.max)
+        return pd.Series(
+            [float(self.count), self.mean if self.count else np.nan, self.std, extremes[0], *quantiles, extremes[1]],
+            index=["count", "mean", "std", "min", *(f"{p * 100:g}%" for p in percentiles), "max"],
+        )
+
+
+def describe_summaries(summaries: dict[str, SummaryStatistics]) -> pd.DataFrame:
+    """
+    Summary statistics of several projects in the layout of ``DataFrame.describe``.
+
+    :param summaries: Statistics by project name.
+    :return: DataFrame with a column per project.
+    """
+    return pd.DataFrame({name: summary.describe() for name, summary in summaries.items()})